@@ -7,8 +7,11 @@ Allows imports like:
 Runtime (ComfyUI) does not require this, but test isolation does.
 """
 
+import importlib.util
+import logging
 import os
-import importlib  # moved to module scope to avoid repeated import in __getattr__
+import sys
+from collections.abc import MutableMapping
 
 
 __all__ = [
@@ -16,22 +19,73 @@ __all__ = [
     "NODE_CLASS_MAPPINGS",
     "NODE_DISPLAY_NAME_MAPPINGS",
     "WEB_DIRECTORY",
-    "saveimage_unimeta",  # exposed via __getattr__ for lazy import
+    "saveimage_unimeta",  # lazy module, materialized on first attribute access
 ]
 
-NODE_CLASS_MAPPINGS = {}
-NODE_DISPLAY_NAME_MAPPINGS = {}
+# __file__ is already absolute for imported modules; skip realpath's per-component symlink stats.
+# Symlinked installs still work: the unresolved path points at the same directory.
+WEB_DIRECTORY = os.path.join(os.path.dirname(__file__), "web")
+_STARTUP_SENTINEL = "ComfyUI_SaveImageWithMetaDataUniversal_startup_logged"
+_NODES_LOADED = False
 
 
-WEB_DIRECTORY = os.path.join(os.path.dirname(os.path.realpath(__file__)), "web")
-_STARTUP_SENTINEL = "ComfyUI_SaveImageWithMetaDataUniversal_startup_logged"
+class _LazyNodeMap(MutableMapping):
+    """Node registry mapping that imports ``saveimage_unimeta.nodes`` on first use.
+
+    ComfyUI only iterates ``NODE_CLASS_MAPPINGS`` after importing the package, so
+    deferring the import until then keeps a bare ``import`` of this package (tooling,
+    test collection) from pulling in the full node graph.
+    """
+
+    __slots__ = ("_data",)
+
+    def __init__(self):
+        self._data = {}
+
+    def _mapping(self):
+        if not _NODES_LOADED:
+            _lazy_load_nodes()
+        return self._data
+
+    def __getitem__(self, key):
+        return self._mapping()[key]
+
+    def __setitem__(self, key, value):
+        self._mapping()[key] = value
+
+    def __delitem__(self, key):
+        del self._mapping()[key]
+
+    def __iter__(self):
+        return iter(self._mapping())
+
+    def __len__(self):
+        return len(self._mapping())
+
+    def __repr__(self):
+        state = repr(self._data) if _NODES_LOADED else "<not loaded>"
+        return f"{type(self).__name__}({state})"
+
+
+NODE_CLASS_MAPPINGS = _LazyNodeMap()
+NODE_DISPLAY_NAME_MAPPINGS = _LazyNodeMap()
 
 
 def _lazy_load_nodes():  # pragma: no cover - side-effect only
-    global NODE_CLASS_MAPPINGS, NODE_DISPLAY_NAME_MAPPINGS
-    if NODE_CLASS_MAPPINGS:  # already loaded
+    global _NODES_LOADED
+    if _NODES_LOADED:
+        return
+    _NODES_LOADED = True
+    if "PYTEST_CURRENT_TEST" in os.environ:
+        # Test runs keep the top-level registry empty; tests import the node modules directly.
         return
     try:
+        # Resolved here rather than at import so a bare package import stays lightweight;
+        # the subpackage is imported on the next line anyway.
+        from .saveimage_unimeta import _envflag
+
+        if _envflag("METADATA_TEST_MODE"):
+            return
         from .saveimage_unimeta.nodes import (
             NODE_CLASS_MAPPINGS as _NCM,
         )
@@ -39,88 +93,76 @@ def _lazy_load_nodes():  # pragma: no cover - side-effect only
             NODE_DISPLAY_NAME_MAPPINGS as _NDNM,
         )
 
-        NODE_CLASS_MAPPINGS = _NCM
-        NODE_DISPLAY_NAME_MAPPINGS = _NDNM
+        NODE_CLASS_MAPPINGS._data = _NCM
+        NODE_DISPLAY_NAME_MAPPINGS._data = _NDNM
     except Exception:  # noqa: BLE001
         # In unit test environment without ComfyUI dependencies we silently continue.
-        NODE_CLASS_MAPPINGS = {}
-        NODE_DISPLAY_NAME_MAPPINGS = {}
+        return
+    _maybe_log_startup()
 
 
 def _maybe_log_startup():  # pragma: no cover
     """Log startup message exactly once per Python session."""
-    import logging
-
     # Use logging module's internal registry as persistent storage
-    # This survives module reloads and reimports within the same Python session
-    logger = logging.getLogger(__name__)
+    # This survives module reloads and reimports within the same Python session.
+    # Check it before anything else so repeat calls skip the color import entirely.
     startup_registry = logging.getLogger("_startup_registry")
-    startup_marker = _STARTUP_SENTINEL
-
-    # Check if we've already logged startup for this module
-    if hasattr(startup_registry, startup_marker):
+    if hasattr(startup_registry, _STARTUP_SENTINEL):
         return
 
-    # Mark that we've logged startup for this module
-    setattr(startup_registry, startup_marker, True)
+    # Mark before importing so a failed color import is not retried on reload
+    setattr(startup_registry, _STARTUP_SENTINEL, True)
+    logger = logging.getLogger(__name__)
 
     try:
         from .saveimage_unimeta.utils.color import cstr  # local import to avoid heavy deps early
     except ImportError:
-        # Fallback for test environments without full dependencies
-        class MockCstr:
-            def __init__(self, text):
-                self.text = str(text)
-
-            @property
-            def msg_o(self):
-                return self.text
-
-            @property
-            def lightviolet(self):
-                return self.text
-
-            @property
-            def end(self):
-                return self.text
-
-        cstr = MockCstr
+        # Test environments without full dependencies log the plain message
+        cstr = None
 
     try:
         count = len(NODE_CLASS_MAPPINGS.keys())
     except Exception:  # noqa: BLE001
         count = 0
 
+    if cstr is None:
+        logger.info("Finished. Loaded %s nodes successfully.", count)
+        return
     logger.info(
-        " ".join(
-            [
-                cstr("Finished.").msg_o,
-                cstr("Loaded").lightviolet,
-                cstr(count).end,
-                cstr("nodes successfully.").lightviolet,
-            ]
-        )
+        "%s %s %s %s",
+        cstr("Finished.").msg_o,
+        cstr("Loaded").lightviolet,
+        cstr(count).end,
+        cstr("nodes successfully.").lightviolet,
     )
 
 
-# --- Lazy attribute access -------------------------------------------------
+# --- Lazy submodule ---------------------------------------------------------
 # Some tests (and potentially user code) attempt to patch or access
 # 'ComfyUI_SaveImageWithMetaDataUniversal.saveimage_unimeta.*'. When the top
 # level package is imported using a custom loader (as done in tests with
 # importlib.util.module_from_spec), Python's usual automatic addition of
-# submodules to the parent package's namespace can be bypassed. Implement
-# PEP 562 style module __getattr__ so attribute resolution triggers a lazy
-# import of the subpackage.
-def __getattr__(name):  # pragma: no cover - simple passthrough
-    if name == "saveimage_unimeta":
-        mod = importlib.import_module(f"{__name__}.saveimage_unimeta")
-        # Cache the module to avoid redundant imports
-        globals()[name] = mod
-        return mod
-    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
-
-
-_ENV = __import__("os").environ
-if "PYTEST_CURRENT_TEST" not in _ENV and "METADATA_TEST_MODE" not in _ENV:
-    _lazy_load_nodes()
-    _maybe_log_startup()
+# submodules to the parent package's namespace can be bypassed. Bind the
+# subpackage eagerly as a LazyLoader module instead: it is a real entry in
+# sys.modules, but its body only executes on first attribute access.
+def _lazy_submodule(name):
+    fullname = f"{__name__}.{name}"
+    existing = sys.modules.get(fullname)
+    if existing is not None:
+        return existing
+    spec = importlib.util.find_spec(fullname)
+    if spec is None or spec.loader is None:  # pragma: no cover - broken install
+        raise ImportError(f"Cannot locate submodule '{fullname}'")
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[fullname] = module
+    loader.exec_module(module)
+    return module
+
+
+saveimage_unimeta = _lazy_submodule("saveimage_unimeta")
+
+
+# Node import and the startup banner are deferred to the first read of NODE_CLASS_MAPPINGS;
+# _lazy_load_nodes skips both under pytest or METADATA_TEST_MODE.
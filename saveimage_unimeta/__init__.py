@@ -11,22 +11,40 @@ of the metadata capture and provides stubs for the `execution` module and hook
 functions to allow for isolated unit testing.
 """
 import functools  # noqa: N999 - module path mandated by ComfyUI folder naming
+import logging
 import os
 
-TEST_MODE = bool(os.environ.get("METADATA_TEST_MODE"))
+logger = logging.getLogger(__name__)
 
-# Exposed environment flag constants for discoverability. These are not
+_ENV_TRUTHY = frozenset({"1", "true", "yes", "on"})
+
+
+def _envflag(name: str) -> bool:
+    """Return True when environment variable ``name`` holds a truthy value.
+
+    Uses the same ``1/true/yes/on`` convention as ``defs`` and ``formatters`` so
+    ``METADATA_TEST_MODE=0`` disables test mode instead of enabling it.
+    """
+    value = os.environ.get(name)
+    return value is not None and value.strip().lower() in _ENV_TRUTHY
+
+
+TEST_MODE = _envflag("METADATA_TEST_MODE")
+
+# Exposed environment flag names for discoverability. These are not
 # enforced here; downstream modules re-read os.environ dynamically at call time.
 # Users can set them prior to launching ComfyUI. All default to False/absent.
-METADATA_ENV_FLAGS = {
-    "METADATA_TEST_MODE": False,  # Multiline deterministic params formatting
-    "METADATA_NO_HASH_DETAIL": False,  # Suppress structured Hash detail JSON block
-    "METADATA_NO_LORA_SUMMARY": False,  # Suppress aggregated LoRAs summary line
-    "METADATA_DEBUG_PROMPTS": False,  # Verbose dual prompt handling logging
-    "METADATA_DEBUG_LORA": False,  # Detailed LoRA parsing diagnostics
-    "METADATA_DEBUG": False,  # General debug enablement
-    # Future: "METADATA_MAX_JPEG_EXIF_KB" (UI param presently preferred)
-}
+METADATA_ENV_FLAGS = frozenset(
+    {
+        "METADATA_TEST_MODE",  # Multiline deterministic params formatting
+        "METADATA_NO_HASH_DETAIL",  # Suppress structured Hash detail JSON block
+        "METADATA_NO_LORA_SUMMARY",  # Suppress aggregated LoRAs summary line
+        "METADATA_DEBUG_PROMPTS",  # Verbose dual prompt handling logging
+        "METADATA_DEBUG_LORA",  # Detailed LoRA parsing diagnostics
+        "METADATA_DEBUG",  # General debug enablement
+        # Future: "METADATA_MAX_JPEG_EXIF_KB" (UI param presently preferred)
+    }
+)
 if not TEST_MODE:  # Only import heavy hook & nodes when running inside ComfyUI
     from .hook import pre_execute, pre_get_input_data
 else:  # Provide no-op placeholders for tests
@@ -65,13 +83,23 @@ except Exception:  # noqa: BLE001 - broad to ensure test environment resilience
     execution = _ExecutionStub()
 
 
+_FAILED_PREFUNCTIONS: set[str] = set()
+
+
 def prefix_function(function, prefunction):
     """Wraps a function to execute a prefunction before it.
 
     This utility function takes two functions, `function` and `prefunction`,
     and returns a new function that, when called, first executes `prefunction`
     with the same arguments and then executes and returns the result of the
-    original `function`.
+    original `function`. An exception raised by `prefunction` is logged (once
+    per prefunction) and swallowed so a metadata hook failure never aborts
+    prompt execution.
+
+    Both callables are bound as keyword-only defaults so the wrapper reads them
+    as fast locals rather than closure cells on every call; `functools.wraps`
+    only runs at patch time and is kept so the patched attributes still carry
+    the original names.
 
     Args:
         function (callable): The original function to be wrapped.
@@ -83,9 +111,15 @@ def prefix_function(function, prefunction):
     """
 
     @functools.wraps(function)
-    def run(*args, **kwargs):
-        prefunction(*args, **kwargs)
-        return function(*args, **kwargs)
+    def run(*args, _prefunction=prefunction, _function=function, **kwargs):
+        try:
+            _prefunction(*args, **kwargs)
+        except Exception:  # noqa: BLE001 - capture hooks must not break execution
+            name = getattr(_prefunction, "__qualname__", repr(_prefunction))
+            if name not in _FAILED_PREFUNCTIONS:
+                _FAILED_PREFUNCTIONS.add(name)
+                logger.warning("[Metadata Lib] Hook %s failed; metadata capture may be incomplete", name, exc_info=True)
+        return _function(*args, **kwargs)
 
     return run
 
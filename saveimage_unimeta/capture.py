@@ -11,13 +11,14 @@ import json
 import logging
 import os
 import re
-from collections.abc import Iterable, Iterator
+from collections.abc import Iterable, Iterator, Mapping
 from types import SimpleNamespace
 from typing import Any, NamedTuple
 
 import folder_paths
 
 # Use the aggregated, runtime-merged definitions (defaults + extensions + optional user JSON)
+from . import defs as _defs  # RULES_REVISION is read at runtime
 from .defs import CAPTURE_FIELD_LIST
 from .defs.formatters import (
     calc_lora_hash,
@@ -32,6 +33,7 @@ from .defs.formatters import (
 from .defs import formatters as _hashfmt  # access HASH_LOG_MODE at runtime
 from .defs.meta import MetaField
 from .utils.color import cstr
+from . import _envflag
 from .utils import pathresolve
 from .version import resolve_runtime_version
 
@@ -39,7 +41,7 @@ from nodes import NODE_CLASS_MAPPINGS
 
 # In unit tests we set METADATA_TEST_MODE to avoid importing the real hook module,
 # which drags in ComfyUI runtime-only dependencies (folder_paths, piexif, etc.).
-_TEST_MODE = bool(os.environ.get("METADATA_TEST_MODE"))
+_TEST_MODE = _envflag("METADATA_TEST_MODE")
 if not _TEST_MODE:
     from . import hook
 else:  # Lightweight stub sufficient for get_inputs traversal
@@ -177,6 +179,106 @@ def _debug_prompts_enabled() -> bool:
     return os.environ.get("METADATA_DEBUG_PROMPTS", "").strip() != ""
 
 
+# cstr(...).msg resolves the color code through dir() on every access; format each debug template once.
+_DEBUG_FMT_CACHE: dict[str, str] = {}
+
+
+def _debug_fmt(template: str) -> str:
+    """Return ``template`` with the colored message prefix applied (cached per template)."""
+    fmt = _DEBUG_FMT_CACHE.get(template)
+    if fmt is None:
+        fmt = _DEBUG_FMT_CACHE[template] = cstr(template).msg
+    return fmt
+
+
+def _safe_str(v: Any) -> str:
+    """Return ``v`` as text: strings pass through, None becomes "" and a failing ``__str__`` yields ""."""
+    if isinstance(v, str):
+        return v
+    if v is None:
+        return ""
+    try:
+        return str(v)
+    except Exception:
+        return ""
+
+
+def _is_object_repr(s: str) -> bool:
+    """Return True for object-like reprs such as ``'<comfy.sd.VAE object at 0x...>'``.
+
+    Leading whitespace is tolerated; the first-character test avoids copying the string in the
+    common case.
+    """
+    if not s:
+        return False
+    if s[0] != "<":
+        if not s[0].isspace() or not s.lstrip().startswith("<"):
+            return False
+    return ">" in s
+
+
+def _sanitize_weight_dtype(v: Any) -> str | None:
+    """Return a readable Weight dtype token for ``v``, or None when it does not look like a dtype.
+
+    Many nodes pass dtype objects or enums; they are stringified cleanly and path-like or
+    purely numeric values are rejected.
+    """
+    try:
+        # Object enums
+        if hasattr(v, "name"):
+            v = v.name
+        v = str(v)
+    except Exception:
+        v = str(v)
+    s = v.strip()
+    hit = _DTYPE_CANONICAL.get(s)
+    if hit is not None:
+        return hit
+    lower = s.lower()
+    # Strip common prefixes like 'torch.' or 'np.'
+    if lower.startswith("torch."):
+        s = s.split(".")[-1]
+        lower = s.lower()
+    if lower.startswith("np.") or lower.startswith("numpy."):
+        s = s.split(".")[-1]
+        lower = s.lower()
+    # Normalize separators
+    s = s.replace("-", "_")
+    lower = s.lower()
+    # Reject path-like or file-like entries
+    if "\\" in s or "/" in s or lower.endswith(".safetensors") or lower.endswith(".st") or lower.endswith(".pt") or lower.endswith(".bin"):
+        return None
+    # Reject pure numeric values (width/height etc.)
+    if s.isdigit() or _DTYPE_NUMERIC_RE.match(s):
+        return None
+    # Common, known tokens
+    if lower in _ALLOWED_DTYPES:
+        return s
+    # Accept short tokens with dots/underscores after stripping prefix
+    if len(s) <= 24 and _DTYPE_TOKEN_RE.match(s):
+        return s
+    return None
+
+
+def _infer_dtype_from_model_name(name: str) -> str | None:
+    """Guess a Weight dtype from dtype hints in a lower-cased model file name.
+
+    One scan collects every hint substring present; categories are then resolved in
+    priority order (fp8, bf16, fp16, float32, int8, int4), independent of position.
+    """
+    found = {m.group(1) for m in _DTYPE_HINT_RE.finditer(name)}
+    if not found:
+        return None
+    if "fp8" in found and ("e4m3fn" in found or "e5m2" in found):
+        if "e4m3fn" not in found:
+            return "fp8_e5m2"
+        return "fp8_e4m3fn_fast" if ("fast" in found or "turbo" in found) else "fp8_e4m3fn"
+    for label, hints in _DTYPE_HINT_CATEGORIES:
+        if not hints.isdisjoint(found):
+            return label
+    return None
+
+
 class _LoRARecord(NamedTuple):
     """A structured record for holding LoRA metadata.
 
@@ -194,6 +296,344 @@ class _LoRARecord(NamedTuple):
 
 
 _LORA_FIELD_INDEX_RE = re.compile(r"(\d+)(?!.*\d)")
+# Bound once: ``list | tuple`` builds a new types.UnionType on every evaluation.
+_SEQ_TYPES = (list, tuple)
+_PATH_SPLIT_RE = re.compile(r"[/\\]")
+_NEWLINE_RUN_RE = re.compile(r"\n{2,}")
+_DIGIT_RUN_RE = re.compile(r"\d+")  # width/height numbers in "WxH"-style size strings
+# Inline ``<lora:name:sm[:sc]>`` tags: strict names for the get_inputs fallback, and the
+# tolerant, case-insensitive form used when merging prompt LoRAs into the record list.
+_INLINE_LORA_TAG_RE = re.compile(r"<lora:([A-Za-z0-9_\-]+):([0-9]*\.?[0-9]+)(?::([0-9]*\.?[0-9]+))?>")
+_PROMPT_LORA_TAG_RE = re.compile(r"<lora:([^:>]+):([0-9]*\.?[0-9]+)(?::([0-9]*\.?[0-9]+))?>", re.IGNORECASE)
+# Weight dtype sanitizing: pure numbers are rejected, short dotted/underscored tokens accepted.
+_DTYPE_NUMERIC_RE = re.compile(r"^\d+(?:\.\d+)?$")
+_DTYPE_TOKEN_RE = re.compile(r"^[A-Za-z0-9_.]+$")
+# Sampler names recognised by the last-resort heuristic scan in gen_pnginfo_dict.
+_KNOWN_SAMPLER_TOKENS: frozenset[str] = frozenset(
+    {
+        "euler",
+        "euler_ancestral",
+        "heun",
+        "dpm_2",
+        "dpm_2_ancestral",
+        "lms",
+        "dpm_fast",
+        "dpm_adaptive",
+        "dpmpp_2s_ancestral",
+        "dpmpp_sde",
+        "dpmpp_sde_gpu",
+        "dpmpp_2m",
+        "dpmpp_2m_sde",
+        "dpmpp_2m_sde_gpu",
+        "dpmpp_3m_sde",
+        "dpmpp_3m_sde_gpu",
+        "lcm",
+        "ddim",
+        "plms",
+        "uni_pc",
+        "uni_pc_bh2",
+    }
+)
+# Standalone sampler token inside a longer (lower-cased) string such as "sampler: euler_ancestral".
+# '.' and '-' also count as word characters so file names like "lcm-lora.safetensors" never match;
+# longest alternatives first so e.g. "dpmpp_2m_sde_gpu" is not cut short at "dpmpp_2m".
+_SAMPLER_TOKEN_RE = re.compile(r"(?<![\w.-])(" + "|".join(sorted(_KNOWN_SAMPLER_TOKENS, key=len, reverse=True)) + r")(?![\w.-])")
+# Weight dtype tokens written through as-is (compared lower-cased).
+_ALLOWED_DTYPES: frozenset[str] = frozenset(
+    {
+        "default",
+        "half",
+        "full",
+        "autocast",
+        "fp16",
+        "bf16",
+        "bfloat16",
+        "float16",
+        "float32",
+        "f32",
+        "f16",
+        "int8",
+        "qint8",
+        "int4",
+        "qint4",
+        # "q4",
+        # "q8",
+        "q4_0",
+        "q5_0",
+        "nf4",
+        # "fp8",
+        "fp8_e4m3fn",
+        "fp8_e4m3fn_fast",
+        "fp8_e5m2",
+        "e4m3fn",
+        "e5m2",
+    }
+)
+# Dual-encoder prompt halves merged by gen_pnginfo_dict, per polarity, in preference order.
+_POSITIVE_VARIANT_PAIRS = (("positive_g", "positive_l"), ("text_g", "text_l"))
+_NEGATIVE_VARIANT_PAIRS = (("negative_g", "negative_l"),)
+_POSITIVE_VARIANT_FIELDS = frozenset(f for pair in _POSITIVE_VARIANT_PAIRS for f in pair)
+_NEGATIVE_VARIANT_FIELDS = frozenset(f for pair in _NEGATIVE_VARIANT_PAIRS for f in pair)
+# Negative prompt texts (stripped, lower-cased) that mean "no negative prompt".
+_EMPTY_NEGATIVE_TOKENS = frozenset({"", "none", "(none)", "no negative"})
+# Model file name hints for the Weight dtype fallback, ordered by priority after the fp8 variants.
+_DTYPE_HINT_CATEGORIES: tuple[tuple[str, frozenset[str]], ...] = (
+    ("bf16", frozenset({"bf16", "bfloat16"})),
+    ("fp16", frozenset({"fp16", "float16", "f16"})),
+    ("float32", frozenset({"float32", "f32"})),
+    ("int8", frozenset({"int8", "q8", "qint8"})),
+    ("int4", frozenset({"int4", "q4", "qint4", "nf4"})),
+)
+# Zero-width lookahead so overlapping hints are all reported (e.g. "f16" inside "bf16"); no hint is
+# a prefix of another, so each start position yields the one hint that begins there.
+_DTYPE_HINT_RE = re.compile(
+    "(?=("
+    + "|".join(
+        sorted(
+            {"fp8", "e4m3fn", "e5m2", "fast", "turbo"}.union(*(hints for _, hints in _DTYPE_HINT_CATEGORIES)),
+            key=len,
+            reverse=True,
+        )
+    )
+    + "))"
+)
+# Exact dtype spellings sanitize_dtype resolves without the slow path: canonical tokens and their
+# torch./np./numpy.-qualified forms (the qualifier is stripped, as the slow path does).
+_DTYPE_CANONICAL: dict[str, str] = {
+    f"{qualifier}{token}": token for token in _ALLOWED_DTYPES for qualifier in ("", "torch.", "np.", "numpy.")
+}
+# Sub-order of the per-slot fields in the parameters string, keyed by the text after "<Prefix>_<i> ".
+_LORA_FIELD_RANK = {"Model name": 0, "Model hash": 1, "Strength model": 2, "Strength clip": 3}
+_EMBEDDING_FIELD_RANK = {"name": 0, "hash": 1}
+_CLIP_FIELD_RANK = {"Model name": 0, "Model hash": 1}
+# json.dumps(..., sort_keys=True) builds a fresh JSONEncoder per call; reuse one for Hash detail.
+_HASH_DETAIL_ENCODER = json.JSONEncoder(sort_keys=True)
+# Civitai display names for ComfyUI sampler (and sampler_scheduler) tokens; used by get_sampler_for_civitai.
+_CIVITAI_SAMPLER_MAP = {
+    "euler_ancestral": "Euler a",
+    "euler": "Euler",
+    "lms": "LMS",
+    "heun": "Heun",
+    "dpm_2": "DPM2",
+    "dpm_2_ancestral": "DPM2 a",
+    "dpmpp_2s_ancestral": "DPM++ 2S a",
+    "dpmpp_2m": "DPM++ 2M",
+    "dpmpp_sde": "DPM++ SDE",
+    "dpmpp_2m_sde": "DPM++ 2M SDE",
+    "dpmpp_3m_sde": "DPM++ 3M SDE",
+    "dpm_fast": "DPM fast",
+    "dpm_adaptive": "DPM adaptive",
+    "lms_karras": "LMS Karras",
+    "dpm_2_karras": "DPM2 Karras",
+    "dpm_2_ancestral_karras": "DPM2 a Karras",
+    "dpmpp_2s_ancestral_karras": "DPM++ 2S a Karras",
+    "dpmpp_2m_karras": "DPM++ 2M Karras",
+    "dpmpp_sde_karras": "DPM++ SDE Karras",
+    "dpmpp_2m_sde_karras": "DPM++ 2M SDE Karras",
+    "dpmpp_3m_sde_karras": "DPM++ 3M SDE Karras",
+    "dpmpp_3m_sde_exponential": "DPM++ 3M SDE Exponential",
+    "ddim": "DDIM",
+    "plms": "PLMS",
+    "uni_pc": "UniPC",
+    "uni_pc_bh2": "UniPC",
+    "lcm": "LCM",
+}
+_CIVITAI_SAMPLER_ALIASES = {
+    "euler_cfg_pp": "euler",
+    "euler_ancestral_cfg_pp": "euler_ancestral",
+    "heunpp2": "heun",
+}
+# Model sampling shift fields copied verbatim into pnginfo, in emission order.
+_SHIFT_PNGINFO_FIELDS = (
+    (MetaField.MAX_SHIFT, "Max shift"),
+    (MetaField.BASE_SHIFT, "Base shift"),
+    (MetaField.SHIFT, "Shift"),
+)
+# Prompt keys rendered in the parameters header rather than the comma-separated field list.
+_PARAMETERS_HEADER_KEYS = frozenset({"Positive prompt", "T5 Prompt", "CLIP Prompt", "Negative prompt"})
+# (raw name, drop_extension) -> Capture._clean_name result; the same names recur on every save.
+_CLEAN_NAME_CACHE: dict[tuple[str, bool], str] = {}
+_CLEAN_NAME_CACHE_MAX = 1024
+
+# Built-in hash formatters -> folder_paths kind used to resolve the artifact for memo keys.
+# Identity lookup covers the bundled rules; the name fragments below keep extension and
+# wrapped formatters (``calc_*_hash`` look-alikes) on the guarded hash path.
+_HASH_FUNCS: dict[Any, str] = {
+    calc_unet_hash: "unet",
+    calc_model_hash: "checkpoints",
+    calc_vae_hash: "vae",
+    calc_lora_hash: "loras",
+}
+_HASH_FORMATTER_KINDS: tuple[tuple[str, str], ...] = (
+    ("unet_hash", "unet"),
+    ("model_hash", "checkpoints"),
+    ("vae_hash", "vae"),
+    ("lora_hash", "loras"),
+)
+
+
+# Formatter classification stored on each normalized rule (see _classify_formatter).
+_FMT_NONE, _FMT_HASH, _FMT_PLAIN = 0, 1, 2
+# Display-name fields whose hash formatters are skipped so the raw name is captured.
+_NAME_META_FIELDS = frozenset({MetaField.MODEL_NAME, MetaField.VAE_NAME, MetaField.LORA_MODEL_NAME})
+# Prompt fields that may carry inline ``<lora:...>`` tags.
+_PROMPT_META_FIELDS = frozenset({MetaField.POSITIVE_PROMPT, MetaField.NEGATIVE_PROMPT})
+# Free-text prompt fields: a sampler word in user prose must not be mistaken for the sampler.
+_PROMPT_TEXT_META_FIELDS = _PROMPT_META_FIELDS | {MetaField.T5_PROMPT, MetaField.CLIP_PROMPT}
+# Fields never searched for an embedded sampler token: prompt text plus model/file names
+# (UNet loaders capture into MODEL_NAME), where a word like "lcm" or "euler" is not a sampler.
+_SAMPLER_EMBED_SKIP_FIELDS = _PROMPT_TEXT_META_FIELDS | {
+    MetaField.MODEL_NAME,
+    MetaField.VAE_NAME,
+    MetaField.LORA_MODEL_NAME,
+    MetaField.CLIP_MODEL_NAME,
+    MetaField.EMBEDDING_NAME,
+}
+# Plain module names for the Flux fallback checks (skips the enum class attribute lookup).
+_MF_T5_PROMPT = MetaField.T5_PROMPT
+_MF_CLIP_PROMPT = MetaField.CLIP_PROMPT
+
+
+class _NormalizedRule(NamedTuple):
+    """A capture rule with its key coerced to ``MetaField`` and callable names pre-resolved."""
+
+    meta: MetaField
+    field_data: Any
+    format_func: Any
+    fmt_kind: int
+    funcname: str  # lowercased ``format`` callable name ("" when absent)
+    selector_name: str | None  # ``selector.__name__`` used as the fallback source tag
+
+
+class _RuleInputs(NamedTuple):
+    """Which raw node inputs a class's rules can read, used to skip ``get_input_data``."""
+
+    always: bool  # a selector/validator or hidden input is involved: always resolve inputs
+    names: frozenset[str]  # ``field_name`` / ``fields`` entries
+    prefixes: tuple[str, ...]  # ``prefix`` rules
+
+
+# Inputs ComfyUI injects from INPUT_TYPES["hidden"]; they never appear in the prompt's node inputs.
+_HIDDEN_INPUT_NAMES = frozenset({"prompt", "extra_pnginfo", "unique_id", "dynprompt"})
+# Stand-in for get_input_data's result when no rule of a node can match any of its inputs.
+_EMPTY_INPUT_DATA: tuple[dict[str, Any], ...] = ({},)
+
+# id(rules) -> (rules, len(rules), defs.RULES_REVISION, [_NormalizedRule, ...], _RuleInputs).
+# Holding ``rules`` keeps its id from being reused while the entry is alive.
+_RULE_CACHE: dict[int, tuple[Any, int, int, list[_NormalizedRule], _RuleInputs]] = {}
+_RULE_CACHE_MAX = 1024
+
+
+def _coerce_meta_key(meta_key: Any) -> MetaField | None:
+    """Map an enum (default rules) or str/int key (user JSON) to ``MetaField``."""
+    if isinstance(meta_key, MetaField):
+        return meta_key
+    if isinstance(meta_key, str):
+        try:
+            return MetaField[meta_key]
+        except KeyError:
+            return None
+    if isinstance(meta_key, int):
+        try:
+            return MetaField(meta_key)
+        except ValueError:
+            return None
+    return None
+
+
+def _hash_folder_kind(format_func: Any, funcname: str) -> str | None:
+    """Return the folder kind a hash formatter reads from, or None for other formatters."""
+    try:
+        kind = _HASH_FUNCS.get(format_func)
+    except TypeError:  # unhashable callable object
+        kind = None
+    if kind is not None:
+        return kind
+    for fragment, fragment_kind in _HASH_FORMATTER_KINDS:
+        if fragment in funcname:
+            return fragment_kind
+    return None
+
+
+def _classify_formatter(meta: MetaField, format_func: Any) -> tuple[int, str]:
+    """Return ``(fmt_kind, lowercased formatter name)`` for a rule's ``format`` callable.
+
+    Hash-style formatters on name fields are classified ``_FMT_NONE`` so the
+    display name is captured verbatim; the dedicated hash rules cover hashing.
+    """
+    if format_func is None:
+        return _FMT_NONE, ""
+    funcname = getattr(format_func, "__name__", "").lower()
+    hash_kind = _hash_folder_kind(format_func, funcname)
+    if meta in _NAME_META_FIELDS and callable(format_func) and (hash_kind is not None or "hash" in funcname):
+        return _FMT_NONE, funcname
+    if hash_kind is not None:
+        return _FMT_HASH, funcname
+    return _FMT_PLAIN, funcname
+
+
+def _rule_cache_entry(rules: Any) -> tuple[Any, int, int, list[_NormalizedRule], _RuleInputs]:
+    """Return the cached derived view of ``rules``, building it on first use.
+
+    Entries are rebuilt when the loaders bump ``defs.RULES_REVISION`` or the
+    mapping gains/loses entries.
+    """
+    revision = getattr(_defs, "RULES_REVISION", 0)
+    size = len(rules)
+    cached = _RULE_CACHE.get(id(rules))
+    if cached is not None and cached[0] is rules and cached[1] == size and cached[2] == revision:
+        return cached
+    normalized = []
+    always = False
+    names: set[str] = set()
+    prefixes: list[str] = []
+    for meta_key, field_data in rules.items():
+        meta = _coerce_meta_key(meta_key)
+        if meta is None:
+            continue
+        is_mapping = isinstance(field_data, Mapping)
+        format_func = field_data.get("format") if is_mapping else None
+        fmt_kind, funcname = _classify_formatter(meta, format_func)
+        selector = field_data.get("selector") if is_mapping else None
+        selector_name = getattr(selector, "__name__", None) if selector is not None else None
+        normalized.append(_NormalizedRule(meta, field_data, format_func, fmt_kind, funcname, selector_name))
+        if not is_mapping or selector is not None or field_data.get("validate") is not None:
+            always = True
+            continue
+        if "prefix" in field_data:
+            prefixes.append(str(field_data["prefix"]))
+        elif "fields" in field_data:
+            field_names = field_data.get("fields") or []
+            if isinstance(field_names, _SEQ_TYPES):
+                names.update(f for f in field_names if isinstance(f, str))
+        elif "field_name" in field_data:
+            names.add(field_data["field_name"])
+    if names & _HIDDEN_INPUT_NAMES:
+        always = True
+    entry = (rules, size, revision, normalized, _RuleInputs(always, frozenset(names), tuple(prefixes)))
+    if len(_RULE_CACHE) >= _RULE_CACHE_MAX:
+        _RULE_CACHE.clear()
+    _RULE_CACHE[id(rules)] = entry
+    return entry
+
+
+def _normalized_rules(rules: Any) -> list[_NormalizedRule]:
+    """Return ``rules`` as ``_NormalizedRule`` entries, skipping invalid keys (cached)."""
+    return _rule_cache_entry(rules)[3]
+
+
+def _rules_may_match(rule_inputs: _RuleInputs, node_inputs: Any) -> bool:
+    """Return True when some rule could read one of ``node_inputs``' keys."""
+    if rule_inputs.always:
+        return True
+    try:
+        keys = node_inputs.keys()
+    except AttributeError:
+        return True
+    if not rule_inputs.names.isdisjoint(keys):
+        return True
+    prefixes = rule_inputs.prefixes
+    return bool(prefixes) and any(k.startswith(prefixes) for k in keys if isinstance(k, str))
 
 
 # If user toggled debug flag, ensure logger emits DEBUG regardless of inherited root level.
@@ -262,7 +702,7 @@ class Capture:
             str: The cleaned name, or "unknown" if normalization fails.
         """
         try:
-            if isinstance(value, list | tuple):  # noqa: UP038
+            if isinstance(value, _SEQ_TYPES):
                 # Capture tuples may include contextual metadata: (node_id, actual_value, optional_field_name).
                 # For 2+ element tuples: extract index 1 (the actual value), not index 0 (the node id).
                 # This ensures we display "EasyNegative.safetensors" rather than node id "42"
@@ -276,6 +716,10 @@ class Capture:
                     return "unknown"
             if not isinstance(value, str):
                 value = str(value)
+            cache_key = (value, drop_extension)
+            cached = _CLEAN_NAME_CACHE.get(cache_key)
+            if cached is not None:
+                return cached
             # Normalize path separators first (support mixed or escaped sequences)
             # UNC paths like \\server\share\model.ckpt should reduce to 'model' when drop_extension.
             # On some platforms os.path.basename on a UNC may still return the full trailing component chain
@@ -283,11 +727,19 @@ class Capture:
             norm = value.replace("\\\\", "\\")
             # Guard against accidental leading double-backslash UNC root leaking into display.
             # We only want the final component for display; intermediate share names are not user‑critical here.
-            parts = re.split(r"[/\\]", norm.rstrip("/\\")) if isinstance(norm, str) else [str(norm)]
-            base = parts[-1] if parts else norm
+            if "/" not in norm and "\\" not in norm:
+                base = norm  # flat name: nothing to split
+            else:
+                base = _PATH_SPLIT_RE.split(norm.rstrip("/\\"))[-1]
             cleaned = base.strip().strip("'").strip('"')
             if drop_extension:
-                cleaned = os.path.splitext(cleaned)[0]
+                # Same result as os.path.splitext on a bare name: leading dots never start an extension.
+                head, dot, _ = cleaned.rpartition(".")
+                if dot and head.strip("."):
+                    cleaned = head
+            if len(_CLEAN_NAME_CACHE) >= _CLEAN_NAME_CACHE_MAX:
+                _CLEAN_NAME_CACHE.clear()
+            _CLEAN_NAME_CACHE[cache_key] = cleaned
             return cleaned
         except Exception:
             try:
@@ -317,7 +769,7 @@ class Capture:
         Returns:
             Any: The extracted value, or None if the entry is an empty container.
         """
-        if isinstance(item, list | tuple):  # noqa: UP038
+        if isinstance(item, _SEQ_TYPES):
             if len(item) >= 2:
                 return item[1]
             if len(item) == 1:
@@ -354,6 +806,22 @@ class Capture:
             return False
         return bool(re.fullmatch(r"[0-9a-fA-F]+", candidate))
 
+    @staticmethod
+    def _sampler_graph_nodes(prompt_graph: Mapping[Any, Any]) -> list[tuple[Any, str, Mapping[str, Any]]]:
+        """Return ``(node_id, class_type, inputs)`` for sampler-like nodes of ``prompt_graph``.
+
+        Covers every class type the sampler_name introspection fallbacks look at
+        (KSampler*, SamplerCustomAdvanced) so the graph is walked at most once.
+        """
+        nodes = []
+        for nid, node_data in prompt_graph.items():
+            if not isinstance(node_data, dict):
+                continue
+            ctype = str(node_data.get("class_type", ""))
+            if "KSampler" in ctype or "SamplerCustomAdvanced" in ctype:
+                nodes.append((nid, ctype, node_data.get("inputs", {}) or {}))
+        return nodes
+
     @staticmethod
     def _build_prompt_embedding_stub_input() -> tuple[dict[str, list[Any]], ...]:
         """Return a lightweight ``input_data`` stub so embedding hashes resolve.
@@ -421,7 +889,7 @@ class Capture:
                 existing.add(cleaned)
 
         def _source_key(item: tuple[Any, ...]) -> Any:
-            if isinstance(item, list | tuple) and item:
+            if isinstance(item, _SEQ_TYPES) and item:
                 return item[0]
             return "prompt-scan"
 
@@ -492,174 +960,133 @@ class Capture:
 
         # Wrap outputs dict with compatibility layer for ComfyUI 0.3.65+ API
         outputs_compat = _OutputCacheCompat(outputs)
+        # Snapshot runtime flags once per traversal rather than per captured field.
+        log_mode = getattr(_hashfmt, "HASH_LOG_MODE", None) or "none"
+        DEBUG_PROMPTS = _debug_prompts_enabled()  # noqa: N806
 
+        # CLIPTextEncodeFlux nodes seen during the walk, with their input_data when already resolved,
+        # so the dual-prompt fallback below does not rescan the whole prompt.
+        flux_nodes: list[tuple[Any, Any]] = []
         for node_id, obj in prompt.items():
             class_type = obj["class_type"]
-            if class_type not in CAPTURE_FIELD_LIST:
+            is_flux = class_type == "CLIPTextEncodeFlux"
+            class_rules = CAPTURE_FIELD_LIST.get(class_type)
+            if class_rules is None:
+                if is_flux:
+                    flux_nodes.append((node_id, None))
                 continue
 
-            obj_class = NODE_CLASS_MAPPINGS[class_type]
+            _, _, _, class_rule_list, rule_inputs = _rule_cache_entry(class_rules)
             node_inputs = prompt[node_id]["inputs"]
-            input_data = get_input_data(
-                node_inputs,
-                obj_class,
-                node_id,
-                outputs_compat,
-                DynamicPrompt(prompt),
-                extra_data,
-            )
-
-            # --- Normalize keys to MetaField enum for both default and user rules ---
-            for meta_key, field_data in CAPTURE_FIELD_LIST[class_type].items():
-                # Allow enum keys (default) and string/int keys (user JSON)
-                if isinstance(meta_key, MetaField):
-                    meta = meta_key
-                elif isinstance(meta_key, str):
-                    try:
-                        meta = MetaField[meta_key]
-                    except KeyError:
-                        # Skip any invalid keys from the user's JSON file.
-                        continue
-                elif isinstance(meta_key, int):
-                    try:
-                        meta = MetaField(meta_key)
-                    except ValueError:
-                        continue
-                else:
-                    # Unknown key type
-                    continue
+            if _rules_may_match(rule_inputs, node_inputs):
+                input_data = get_input_data(
+                    node_inputs,
+                    NODE_CLASS_MAPPINGS[class_type],
+                    node_id,
+                    outputs_compat,
+                    DynamicPrompt(prompt),
+                    extra_data,
+                )
+                if is_flux:
+                    flux_nodes.append((node_id, input_data))
+            else:
+                # No rule reads any of this node's inputs; still walk the rules so their
+                # (empty) buckets and inline-prompt registrations match a full resolve.
+                input_data = _EMPTY_INPUT_DATA
+                if is_flux:
+                    flux_nodes.append((node_id, None))
+
+            # Keys are normalized to MetaField once per rule set (enum defaults, str/int user JSON)
+            for meta, field_data, format_func, fmt_kind, funcname, selector_name in class_rule_list:
                 validate = field_data.get("validate")
                 if validate is not None and not validate(node_id, obj, prompt, extra_data, outputs, input_data):
                     continue
 
-                if meta not in inputs:
-                    inputs[meta] = []
+                bucket = inputs.setdefault(meta, [])
 
-                allow_inline = bool(field_data.get("inline_lora_candidate")) and meta in {
-                    MetaField.POSITIVE_PROMPT,
-                    MetaField.NEGATIVE_PROMPT,
-                }
+                allow_inline = meta in _PROMPT_META_FIELDS and bool(field_data.get("inline_lora_candidate"))
                 if allow_inline:
                     inline_prompt_nodes.add(str(node_id))
 
                 # Handle our new "prefix" based selectors for multi-input nodes
                 if "prefix" in field_data:
                     prefix = field_data["prefix"]
-                    values = [
-                        v[0]
-                        for k, v in input_data[0].items()
-                        if k.startswith(prefix) and isinstance(v, list) and v and v[0] != "None"
-                    ]
                     tag = field_data.get("source_tag") or f"prefix:{prefix}"
-                    for val in values:
-                        if tag is not None:
-                            inputs[meta].append((node_id, val, tag))
-                        else:
-                            inputs[meta].append((node_id, val))
+                    # Single pass in input order; keys are matched by prefix (not probed by index) so
+                    # gaps and non-numeric suffixes such as ``clip_name`` / ``clip_name_extra`` still match.
+                    for k, v in input_data[0].items():
+                        if isinstance(v, list) and v and k.startswith(prefix):
+                            val = v[0]
+                            if val != "None":
+                                bucket.append((node_id, val, tag))
                     continue
 
                 # NEW: Handle explicit multi-field list enumeration produced by upgraded scanner ("fields": [list])
                 if "fields" in field_data:
                     field_names = field_data.get("fields") or []
-                    if isinstance(field_names, list | tuple):  # noqa: UP038
-                        for fname in field_names:
-                            try:
+                    if isinstance(field_names, _SEQ_TYPES):
+                        data_map = input_data[0]
+                        source_tag = field_data.get("source_tag")
+                        # One guard per rule: each formatter call below already handles its own failures.
+                        try:
+                            for fname in field_names:
                                 if not isinstance(fname, str):
                                     continue
-                                value = input_data[0].get(fname)
+                                value = data_map.get(fname)
                                 if value is None:
                                     continue
-                                format_func = field_data.get("format")
                                 v = value
                                 if isinstance(value, list) and len(value) > 0:
                                     v = value[0]
-                                skip_hash_on_name = (
-                                    isinstance(meta, MetaField)
-                                    and meta
-                                    in {
-                                        MetaField.MODEL_NAME,
-                                        MetaField.VAE_NAME,
-                                        MetaField.LORA_MODEL_NAME,
-                                    }
-                                    and callable(format_func)
-                                    and "hash" in getattr(format_func, "__name__", "").lower()
-                                )
-                                if format_func is not None and not skip_hash_on_name:
-                                    funcname = getattr(format_func, "__name__", "").lower()
+                                if fmt_kind == _FMT_HASH:
                                     # Guard expensive hash formatters unless value string appears path-like
-                                    if (
-                                        "unet_hash" in funcname
-                                        or "model_hash" in funcname
-                                        or "vae_hash" in funcname
-                                        or "lora_hash" in funcname
-                                    ):
-                                        try:
-                                            v_str = v if isinstance(v, str) else str(v)
-                                        except Exception:  # pragma: no cover - string conversion failure
-                                            v_str = None
-                                        looks_like_file = False
-                                        if isinstance(v_str, str):
-                                            vl = v_str.lower()
-                                            looks_like_file = (
-                                                "\\" in v_str
-                                                or "/" in v_str
-                                                or any(vl.endswith(ext) for ext in pathresolve.SUPPORTED_MODEL_EXTENSIONS)
-                                            )
-                                        # If user enabled hash logging, allow calling even for name-like tokens
-                                        try:
-                                            log_mode = getattr(_hashfmt, "HASH_LOG_MODE", "none")
-                                        except Exception:
-                                            log_mode = "none"
-                                        allow_call = (log_mode != "none") or (not isinstance(v, str) or looks_like_file)
-                                        if allow_call:
-                                            try:
-                                                v = format_func(v, input_data)
-                                            except (OSError, ValueError) as e:
-                                                logger.debug(
-                                                    "[Metadata Capture] Hash formatter skipped (%s): %r",
-                                                    funcname,
-                                                    e,
-                                                )
-                                            except Exception as e:  # pragma: no cover - unexpected
-                                                logger.debug(
-                                                    "[Metadata Capture] Hash formatter unexpected error %s: %r",
-                                                    funcname,
-                                                    e,
-                                                )
-                                    else:
+                                    v_str = _safe_str(v)
+                                    looks_like_file = (
+                                        "\\" in v_str or "/" in v_str or v_str.lower().endswith(pathresolve.SUPPORTED_MODEL_EXTENSIONS)
+                                    )
+                                    # If user enabled hash logging, allow calling even for name-like tokens
+                                    allow_call = (log_mode != "none") or (not isinstance(v, str) or looks_like_file)
+                                    if allow_call:
                                         try:
                                             v = format_func(v, input_data)
-                                        except (ValueError, TypeError) as e:
+                                        except (OSError, ValueError) as e:
                                             logger.debug(
-                                                "[Metadata Capture] Formatter '%s' value/type issue: %r",
+                                                "[Metadata Capture] Hash formatter skipped (%s): %r",
                                                 funcname,
                                                 e,
                                             )
-                                        except Exception as e:  # pragma: no cover
+                                        except Exception as e:  # pragma: no cover - unexpected
                                             logger.debug(
-                                                "[Metadata Capture] Formatter '%s' unexpected error: %r",
+                                                "[Metadata Capture] Hash formatter unexpected error %s: %r",
                                                 funcname,
                                                 e,
                                             )
-                                tag = field_data.get("source_tag") or fname
+                                elif fmt_kind == _FMT_PLAIN:
+                                    try:
+                                        v = format_func(v, input_data)
+                                    except (ValueError, TypeError) as e:
+                                        logger.debug(
+                                            "[Metadata Capture] Formatter '%s' value/type issue: %r",
+                                            funcname,
+                                            e,
+                                        )
+                                    except Exception as e:  # pragma: no cover
+                                        logger.debug(
+                                            "[Metadata Capture] Formatter '%s' unexpected error: %r",
+                                            funcname,
+                                            e,
+                                        )
+                                tag = source_tag or fname
                                 if isinstance(v, list):
                                     for x in v:
-                                        inputs[meta].append((node_id, x, tag))
+                                        bucket.append((node_id, x, tag))
                                 else:
-                                    inputs[meta].append((node_id, v, tag))
-                            except KeyError as e:  # missing field in input_data mapping
-                                logger.debug(
-                                    "[Metadata Capture] Missing expected field '%s' in multi-field rule: %r",
-                                    fname,
-                                    e,
-                                )
-                                continue
-                            except Exception as e:  # pragma: no cover - defensive
-                                logger.debug(
-                                    "[Metadata Capture] Unexpected multi-field processing error: %r",
-                                    e,
-                                )
-                                continue
+                                    bucket.append((node_id, v, tag))
+                        except Exception as e:  # pragma: no cover - defensive
+                            logger.debug(
+                                "[Metadata Capture] Unexpected multi-field processing error: %r",
+                                e,
+                            )
                     continue
 
                 selector = field_data.get("selector")
@@ -681,128 +1108,98 @@ class Capture:
                             e,
                         )
                         v = None
-                    tag = field_data.get("source_tag") or getattr(selector, "__name__", None)
+                    tag = field_data.get("source_tag") or selector_name
                     if isinstance(v, list):
                         for x in v:
                             if tag is not None:
-                                inputs[meta].append((node_id, x, tag))
+                                bucket.append((node_id, x, tag))
                             else:
-                                inputs[meta].append((node_id, x))
+                                bucket.append((node_id, x))
                     elif v is not None:
                         if tag is not None:
-                            inputs[meta].append((node_id, v, tag))
+                            bucket.append((node_id, v, tag))
                         else:
-                            inputs[meta].append((node_id, v))
+                            bucket.append((node_id, v))
                     continue
 
                 if "field_name" in field_data:
                     field_name = field_data["field_name"]
                     value = input_data[0].get(field_name)
                     if value is not None:
-                        format_func = field_data.get("format")
                         v = value[0] if isinstance(value, list) and len(value) > 0 else value
-                        skip_hash_on_name = (
-                            isinstance(meta, MetaField)
-                            and meta
-                            in {
-                                MetaField.MODEL_NAME,
-                                MetaField.VAE_NAME,
-                                MetaField.LORA_MODEL_NAME,
-                            }
-                            and callable(format_func)
-                            and "hash" in getattr(format_func, "__name__", "").lower()
-                        )
-                        if format_func is not None and not skip_hash_on_name:
-                            funcname = getattr(format_func, "__name__", "").lower()
-                            if "unet_hash" in funcname or "model_hash" in funcname or "vae_hash" in funcname or "lora_hash" in funcname:
-                                try:
-                                    v_str = v if isinstance(v, str) else str(v)
-                                except Exception:  # pragma: no cover
-                                    v_str = None
-                                looks_like_file = False
-                                if isinstance(v_str, str):
-                                    vl = v_str.lower()
-                                    looks_like_file = (
-                                        "\\" in v_str
-                                        or "/" in v_str
-                                        or any(vl.endswith(ext) for ext in pathresolve.SUPPORTED_MODEL_EXTENSIONS)
-                                    )
-                                try:
-                                    log_mode = getattr(_hashfmt, "HASH_LOG_MODE", "none")
-                                except Exception:
-                                    log_mode = "none"
-                                allow_call = (log_mode != "none") or (not isinstance(v, str) or looks_like_file)
-                                if allow_call:
-                                    try:
-                                        v = format_func(v, input_data)
-                                    except (OSError, ValueError) as e:
-                                        logger.debug(
-                                            "[Metadata Capture] Hash formatter skipped (%s): %r",
-                                            funcname,
-                                            e,
-                                        )
-                                    except Exception as e:  # pragma: no cover
-                                        logger.debug(
-                                            "[Metadata Capture] Hash formatter unexpected error %s: %r",
-                                            funcname,
-                                            e,
-                                        )
-                            else:
+                        if fmt_kind == _FMT_HASH:
+                            v_str = _safe_str(v)
+                            looks_like_file = (
+                                "\\" in v_str or "/" in v_str or v_str.lower().endswith(pathresolve.SUPPORTED_MODEL_EXTENSIONS)
+                            )
+                            allow_call = (log_mode != "none") or (not isinstance(v, str) or looks_like_file)
+                            if allow_call:
                                 try:
                                     v = format_func(v, input_data)
-                                except (TypeError, ValueError) as e:
+                                except (OSError, ValueError) as e:
                                     logger.debug(
-                                        "[Metadata Capture] Formatter '%s' value/type issue: %r",
+                                        "[Metadata Capture] Hash formatter skipped (%s): %r",
                                         funcname,
                                         e,
                                     )
                                 except Exception as e:  # pragma: no cover
                                     logger.debug(
-                                        "[Metadata Capture] Formatter '%s' unexpected error: %r",
+                                        "[Metadata Capture] Hash formatter unexpected error %s: %r",
                                         funcname,
                                         e,
                                     )
+                        elif fmt_kind == _FMT_PLAIN:
+                            try:
+                                v = format_func(v, input_data)
+                            except (TypeError, ValueError) as e:
+                                logger.debug(
+                                    "[Metadata Capture] Formatter '%s' value/type issue: %r",
+                                    funcname,
+                                    e,
+                                )
+                            except Exception as e:  # pragma: no cover
+                                logger.debug(
+                                    "[Metadata Capture] Formatter '%s' unexpected error: %r",
+                                    funcname,
+                                    e,
+                                )
                         tag = field_data.get("source_tag") or field_name
                         if isinstance(v, list):
                             for x in v:
-                                inputs[meta].append((node_id, x, tag))
+                                bucket.append((node_id, x, tag))
                         else:
-                            inputs[meta].append((node_id, v, tag))
+                            bucket.append((node_id, v, tag))
 
         # --- Flux dual-prompt fallback ---
         try:
-            need_t5 = MetaField.T5_PROMPT not in inputs
-            need_clip = MetaField.CLIP_PROMPT not in inputs
+            need_t5 = _MF_T5_PROMPT not in inputs
+            need_clip = _MF_CLIP_PROMPT not in inputs
             if need_t5 or need_clip:
-                DEBUG_PROMPTS = _debug_prompts_enabled()  # noqa: N806
-                for node_id, obj in prompt.items():
-                    if obj.get("class_type") != "CLIPTextEncodeFlux":
-                        continue
+                for node_id, input_data in flux_nodes:
                     try:
-                        obj_class = NODE_CLASS_MAPPINGS[obj["class_type"]]
-                        node_inputs = prompt[node_id]["inputs"]
-                        input_data = get_input_data(
-                            node_inputs,
-                            obj_class,
-                            node_id,
-                            outputs_compat,
-                            DynamicPrompt(prompt),
-                            extra_data,
-                        )
+                        if input_data is None:
+                            input_data = get_input_data(
+                                prompt[node_id]["inputs"],
+                                NODE_CLASS_MAPPINGS["CLIPTextEncodeFlux"],
+                                node_id,
+                                outputs_compat,
+                                DynamicPrompt(prompt),
+                                extra_data,
+                            )
                         data_map = input_data[0]
                         if need_t5 and "t5xxl" in data_map:
                             raw = data_map["t5xxl"]
                             if isinstance(raw, list) and raw:
                                 raw = raw[0]
                             if raw and isinstance(raw, str) and raw.strip():
-                                inputs.setdefault(MetaField.T5_PROMPT, []).append((node_id, raw, "t5xxl"))
+                                inputs.setdefault(_MF_T5_PROMPT, []).append((node_id, raw, "t5xxl"))
                                 need_t5 = False
                         if need_clip and "clip_l" in data_map:
                             raw = data_map["clip_l"]
                             if isinstance(raw, list) and raw:
                                 raw = raw[0]
                             if raw and isinstance(raw, str) and raw.strip():
-                                inputs.setdefault(MetaField.CLIP_PROMPT, []).append((node_id, raw, "clip_l"))
+                                inputs.setdefault(_MF_CLIP_PROMPT, []).append((node_id, raw, "clip_l"))
                                 need_clip = False
                         if DEBUG_PROMPTS and (not need_t5 or not need_clip):
                             logger.debug(
@@ -823,14 +1220,11 @@ class Capture:
             inline_filter: set[str] | None = {str(node_id) for node_id in inline_prompt_nodes} if inline_prompt_nodes else None
             should_attempt_inline = (not has_lora_entries) and bool(inline_filter)
             if should_attempt_inline:
-                import re
-
-                pattern = re.compile(r"<lora:([A-Za-z0-9_\-]+):([0-9]*\.?[0-9]+)(?::([0-9]*\.?[0-9]+))?>")
                 raw_candidates: list[str] = []
                 for prompt_meta in (MetaField.POSITIVE_PROMPT, MetaField.NEGATIVE_PROMPT):
                     for tup in inputs.get(prompt_meta) or ():
                         node_ref = None
-                        if isinstance(tup, list | tuple) and tup:
+                        if isinstance(tup, _SEQ_TYPES) and tup:
                             node_ref = str(tup[0])
                         node_id_allowed = True
                         if inline_filter is not None:
@@ -841,7 +1235,7 @@ class Capture:
                         if not node_id_allowed:
                             continue
                         val = cls._extract_value(tup)
-                        if isinstance(val, str):
+                        if isinstance(val, str) and "<lora:" in val:
                             raw_candidates.append(val)
                 if hasattr(hook, "current_prompt"):
                     for node_id, node_data in getattr(hook, "current_prompt", {}).items():
@@ -849,26 +1243,35 @@ class Capture:
                             continue
                         try:
                             for v in node_data.get("inputs", {}).values():
-                                if isinstance(v, list | tuple):
+                                if isinstance(v, _SEQ_TYPES):
                                     for vv in v:
-                                        if isinstance(vv, str):
+                                        if isinstance(vv, str) and "<lora:" in vv:
                                             raw_candidates.append(vv)
-                                elif isinstance(v, str):
+                                elif isinstance(v, str) and "<lora:" in v:
                                     raw_candidates.append(v)
                         except Exception:
                             continue
                 seen: set[tuple[str, str, str | None]] = set()
-                for text in raw_candidates:
-                    for m in pattern.finditer(text):
-                        name, sm, sc = m.group(1), m.group(2), m.group(3)
-                        key = (name, sm, sc)
-                        if key in seen:
-                            continue
-                        seen.add(key)
-                        inputs.setdefault(MetaField.LORA_MODEL_NAME, []).append(("inline", name))
-                        inputs.setdefault(MetaField.LORA_STRENGTH_MODEL, []).append(("inline", sm))
-                        if sc is not None:
-                            inputs.setdefault(MetaField.LORA_STRENGTH_CLIP, []).append(("inline", sc))
+                # Only strings containing the literal tag opener are kept (the pattern is case-sensitive).
+                # One scan over all candidates; NUL can never be part of a match, so no tag spans two strings.
+                matches = _INLINE_LORA_TAG_RE.finditer("\x00".join(raw_candidates)) if raw_candidates else ()
+                # Bucket appends are bound on first use so no bucket is created without a match.
+                name_append = strength_append = clip_append = None
+                for m in matches:
+                    key = m.groups()
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    name, sm, sc = key
+                    if name_append is None:
+                        name_append = inputs.setdefault(MetaField.LORA_MODEL_NAME, []).append
+                        strength_append = inputs.setdefault(MetaField.LORA_STRENGTH_MODEL, []).append
+                    name_append(("inline", name))
+                    strength_append(("inline", sm))
+                    if sc is not None:
+                        if clip_append is None:
+                            clip_append = inputs.setdefault(MetaField.LORA_STRENGTH_CLIP, []).append
+                        clip_append(("inline", sc))
         except Exception:  # pragma: no cover
             pass  # Inline LoRA extraction may fail - continue with captured data
 
@@ -921,8 +1324,8 @@ class Capture:
         DEBUG_PROMPTS = _debug_prompts_enabled()  # noqa: N806
 
         def update_pnginfo_dict(inputs, metafield, key):
-            x = inputs.get(metafield, [])
-            if len(x) > 0:
+            x = inputs.get(metafield)
+            if x:
                 # Choose the first sensible value (skip None and 'N/A' when possible)
                 val = None
                 for candidate in Capture._iter_values(x):
@@ -943,79 +1346,7 @@ class Capture:
                         pass  # Keep original value if conversion fails
                 # Normalize Weight dtype to a readable string
                 if key == "Weight dtype":
-                    # Many nodes pass dtype objects or enums; stringify cleanly and sanitize
-                    def sanitize_dtype(v):
-                        import re
-
-                        try:
-                            # Object enums
-                            if hasattr(v, "name"):
-                                v = v.name
-                            v = str(v)
-                        except Exception:
-                            v = str(v)
-                        s = v.strip()
-                        lower = s.lower()
-                        # Strip common prefixes like 'torch.' or 'np.'
-                        if lower.startswith("torch."):
-                            s = s.split(".")[-1]
-                            lower = s.lower()
-                        if lower.startswith("np.") or lower.startswith("numpy."):
-                            s = s.split(".")[-1]
-                            lower = s.lower()
-                        # Normalize separators
-                        s = s.replace("-", "_")
-                        lower = s.lower()
-                        # Reject path-like or file-like entries
-                        if (
-                            "\\" in s
-                            or "/" in s
-                            or lower.endswith(".safetensors")
-                            or lower.endswith(".st")
-                            or lower.endswith(".pt")
-                            or lower.endswith(".bin")
-                        ):
-                            return None
-                        # Reject pure numeric values (width/height etc.)
-                        if s.isdigit() or re.match(r"^\d+(?:\.\d+)?$", s):
-                            return None
-                        # Common, known tokens
-                        allowed = {
-                            "default",
-                            "half",
-                            "full",
-                            "autocast",
-                            "fp16",
-                            "bf16",
-                            "bfloat16",
-                            "float16",
-                            "float32",
-                            "f32",
-                            "f16",
-                            "int8",
-                            "qint8",
-                            "int4",
-                            "qint4",
-                            # "q4",
-                            # "q8",
-                            "q4_0",
-                            "q5_0",
-                            "nf4",
-                            # "fp8",
-                            "fp8_e4m3fn",
-                            "fp8_e4m3fn_fast",
-                            "fp8_e5m2",
-                            "e4m3fn",
-                            "e5m2",
-                        }
-                        if lower in allowed:
-                            return s
-                        # Accept short tokens with dots/underscores after stripping prefix
-                        if len(s) <= 24 and re.match(r"^[A-Za-z0-9_.]+$", s):
-                            return s
-                        return None
-
-                    sanitized = sanitize_dtype(val)
+                    sanitized = _sanitize_weight_dtype(val)
                     if sanitized is None:
                         return  # skip writing invalid dtype
                     val = sanitized
@@ -1026,14 +1357,15 @@ class Capture:
         update_pnginfo_dict(inputs_before_sampler_node, MetaField.CLIP_PROMPT, "CLIP prompt")
         update_pnginfo_dict(inputs_before_sampler_node, MetaField.NEGATIVE_PROMPT, "Negative prompt")
         # Fallback: if prompts not captured before sampler, try inputs before this node
-        if "Positive prompt" not in pnginfo_dict:
-            update_pnginfo_dict(inputs_before_this_node, MetaField.POSITIVE_PROMPT, "Positive prompt")
-        if "Negative prompt" not in pnginfo_dict:
-            update_pnginfo_dict(inputs_before_this_node, MetaField.NEGATIVE_PROMPT, "Negative prompt")
-        if "T5 prompt" not in pnginfo_dict:
-            update_pnginfo_dict(inputs_before_this_node, MetaField.T5_PROMPT, "T5 prompt")
-        if "CLIP prompt" not in pnginfo_dict:
-            update_pnginfo_dict(inputs_before_this_node, MetaField.CLIP_PROMPT, "CLIP prompt")
+        # (only when that snapshot actually holds entries for the field).
+        for key, metafield in (
+            ("Positive prompt", MetaField.POSITIVE_PROMPT),
+            ("Negative prompt", MetaField.NEGATIVE_PROMPT),
+            ("T5 prompt", MetaField.T5_PROMPT),
+            ("CLIP prompt", MetaField.CLIP_PROMPT),
+        ):
+            if key not in pnginfo_dict and inputs_before_this_node.get(metafield):
+                update_pnginfo_dict(inputs_before_this_node, metafield, key)
 
         # --- Special-case merging of prompt variant pairs on the SAME node ---
         def _merge_prompt_variants(meta_field, positive=True):
@@ -1043,24 +1375,22 @@ class Capture:
                 src_lists.append(inputs_before_this_node.get(meta_field, []))
             # Examine per node id
             # For positives we consider both *_g/*_l and text_g/text_l. For negatives only negative_g/negative_l.
-            if positive:
-                variant_pairs = [("positive_g", "positive_l"), ("text_g", "text_l")]
-            else:
-                variant_pairs = [("negative_g", "negative_l")]
-            # Flatten but keep triples (node_id, value, field_name)
-            triples = []
-            for lst in src_lists:
-                for t in lst or []:
-                    if isinstance(t, list | tuple) and len(t) >= 3:  # noqa: UP038
-                        triples.append(t[:3])
+            variant_pairs = _POSITIVE_VARIANT_PAIRS if positive else _NEGATIVE_VARIANT_PAIRS
+            target_fields = _POSITIVE_VARIANT_FIELDS if positive else _NEGATIVE_VARIANT_FIELDS
+            # Single pass over (node_id, value, field_name) triples, keeping only variant fields.
+            # The last value per node/field wins and nodes keep first-seen order, so no early exit.
             by_node = {}
-            for nid, val, fname in triples:
-                try:
-                    lf = fname.lower()
-                except Exception:
-                    continue
-                by_node.setdefault(nid, {})[lf] = val
-            for nid, fmap in by_node.items():
+            for lst in src_lists:
+                for t in lst or ():
+                    # Index instead of isinstance + slice; short or non-sequence rows fall out here,
+                    # and anything else (e.g. a str row) cannot produce a variant field name.
+                    try:
+                        nid, val, lf = t[0], t[1], t[2].lower()
+                    except Exception:
+                        continue
+                    if lf in target_fields:
+                        by_node.setdefault(nid, {})[lf] = val
+            for fmap in by_node.values():
                 for a, b in variant_pairs:
                     if a in fmap and b in fmap:
                         # Build newline-joined combined prompt
@@ -1080,17 +1410,8 @@ class Capture:
         neg_raw = pnginfo_dict.get("Negative prompt")
         pos_raw = pnginfo_dict.get("Positive prompt")
 
-        def _normalize(s):
-            if s is None:
-                return ""
-            return str(s).strip().lower()
-
-        if not _normalize(neg_raw) or _normalize(neg_raw) in {
-            "none",
-            "(none)",
-            "no negative",
-            "",
-        }:
+        neg_norm = "" if neg_raw is None else str(neg_raw).strip().lower()
+        if neg_norm in _EMPTY_NEGATIVE_TOKENS:
             pnginfo_dict["Negative prompt"] = ""
         elif pos_raw and neg_raw == pos_raw:
             # identical single-line or identical multi-line collapse -> treat as absent
@@ -1099,15 +1420,11 @@ class Capture:
         if DEBUG_PROMPTS:
             try:
                 logger.debug(
-                    cstr("[Metadata Debug] Post-normalization prompt keys: %s").msg
-                    if _debug_prompts_enabled()
-                    else "[Metadata Debug] Post-normalization prompt keys: %s",
+                    _debug_fmt("[Metadata Debug] Post-normalization prompt keys: %s"),
                     [k for k in pnginfo_dict.keys() if "prompt" in k.lower()],
                 )
                 logger.debug(
-                    cstr("[Metadata Debug] Values => Positive=%r T5=%r CLIP=%r Negative=%r").msg
-                    if _debug_prompts_enabled()
-                    else "[Metadata Debug] Values => Positive=%r T5=%r CLIP=%r Negative=%r",
+                    _debug_fmt("[Metadata Debug] Values => Positive=%r T5=%r CLIP=%r Negative=%r"),
                     pnginfo_dict.get("Positive prompt"),
                     (pnginfo_dict.get("T5 Prompt") or pnginfo_dict.get("T5 prompt")),
                     (pnginfo_dict.get("CLIP Prompt") or pnginfo_dict.get("CLIP prompt")),
@@ -1118,25 +1435,20 @@ class Capture:
 
         # Normalize any lowercase 't5 prompt'/'clip prompt' to Title-case and remove duplicates early
         try:
-            # Promote lowercase to Title-case
-            if "t5 prompt" in {k.lower(): k for k in pnginfo_dict.keys()}:
-                # Find actual key variants
-                for k in list(pnginfo_dict.keys()):
-                    if k.lower() == "t5 prompt":
-                        val = pnginfo_dict[k]
-                        # If Title-case already exists, keep Title-case, else create it
-                        if "T5 Prompt" not in pnginfo_dict:
-                            pnginfo_dict["T5 Prompt"] = val
-                        if k != "T5 Prompt":
-                            pnginfo_dict.pop(k, None)
-            if "clip prompt" in {k.lower(): k for k in pnginfo_dict.keys()}:
-                for k in list(pnginfo_dict.keys()):
-                    if k.lower() == "clip prompt":
-                        val = pnginfo_dict[k]
-                        if "CLIP Prompt" not in pnginfo_dict:
-                            pnginfo_dict["CLIP Prompt"] = val
-                        if k != "CLIP Prompt":
-                            pnginfo_dict.pop(k, None)
+            # Promote lowercase to Title-case: one pass finds the case variants, then T5 is
+            # resolved before CLIP so newly created Title-case keys keep their previous order.
+            variant_keys = {"t5 prompt": [], "clip prompt": []}
+            for k in pnginfo_dict:
+                bucket = variant_keys.get(k.lower())
+                if bucket is not None:
+                    bucket.append(k)
+            for title, keys in (("T5 Prompt", variant_keys["t5 prompt"]), ("CLIP Prompt", variant_keys["clip prompt"])):
+                for k in keys:
+                    # If Title-case already exists, keep Title-case, else create it
+                    if title not in pnginfo_dict:
+                        pnginfo_dict[title] = pnginfo_dict[k]
+                    if k != title:
+                        pnginfo_dict.pop(k, None)
         except Exception:
             pass  # Prompt normalization may fail - continue with unnormalized prompts
 
@@ -1148,25 +1460,26 @@ class Capture:
             if ("T5 Prompt" not in pnginfo_dict) and ("CLIP Prompt" not in pnginfo_dict):
                 pos_prompt_val = pnginfo_dict.get("Positive prompt")
                 if pos_prompt_val:
-                    clip_names = []
-                    i = 1
-                    while True:
-                        k = f"CLIP_{i} Model name"
-                        if k not in pnginfo_dict:
-                            break
-                        clip_names.append(str(pnginfo_dict.get(k)))
-                        i += 1
+                    # One pass over the keys instead of probing CLIP_1, CLIP_2, ... until a miss;
+                    # the keys are written with contiguous indices, so index order is enough.
+                    clip_slots = {}
+                    for k in pnginfo_dict:
+                        if k.startswith("CLIP_") and k.endswith(" Model name"):
+                            slot = k[5:-11]
+                            if slot.isdigit():
+                                clip_slots[int(slot)] = k
+                    clip_names = [str(pnginfo_dict[clip_slots[i]]) for i in sorted(clip_slots)]
                     if len(clip_names) >= 2 and any("t5" in n.lower() for n in clip_names):
                         pnginfo_dict["T5 Prompt"] = pos_prompt_val
                         pnginfo_dict["CLIP Prompt"] = pos_prompt_val
                         if DEBUG_PROMPTS:
                             logger.debug(
-                                cstr("[Metadata Debug] Dual prompt aliasing applied with clip_names=%s").msg,
+                                _debug_fmt("[Metadata Debug] Dual prompt aliasing applied with clip_names=%s"),
                                 clip_names,
                             )
                     elif DEBUG_PROMPTS:
                         logger.debug(
-                            cstr("[Metadata Debug] Dual prompt aliasing conditions not met clip_names=%s").msg,
+                            _debug_fmt("[Metadata Debug] Dual prompt aliasing conditions not met clip_names=%s"),
                             clip_names,
                         )
         except Exception:
@@ -1185,12 +1498,10 @@ class Capture:
 
         sampler_names = inputs_before_sampler_node.get(MetaField.SAMPLER_NAME, [])
         schedulers = inputs_before_sampler_node.get(MetaField.SCHEDULER, [])
-        if _debug_prompts_enabled():
+        if DEBUG_PROMPTS:
             try:
                 logger.debug(
-                    cstr("[Metadata Debug] Raw sampler_names=%r schedulers=%r (pre-fallback)").msg
-                    if _debug_prompts_enabled()
-                    else "[Metadata Debug] Raw sampler_names=%r schedulers=%r (pre-fallback)",
+                    _debug_fmt("[Metadata Debug] Raw sampler_names=%r schedulers=%r (pre-fallback)"),
                     sampler_names,
                     schedulers,
                 )
@@ -1203,21 +1514,21 @@ class Capture:
             fallback_sampler_names = inputs_before_this_node.get(MetaField.SAMPLER_NAME, [])
             if fallback_sampler_names:
                 sampler_names = fallback_sampler_names
-                if _debug_prompts_enabled():
+                if DEBUG_PROMPTS:
                     try:
                         logger.debug(
-                            cstr("[Metadata Debug] Recovered sampler_names from inputs_before_this_node: %r").msg,
+                            _debug_fmt("[Metadata Debug] Recovered sampler_names from inputs_before_this_node: %r"),
                             sampler_names,
                         )
                     except Exception:
                         pass  # Debug logging may fail - continue processing
-            elif _debug_prompts_enabled():
+            elif DEBUG_PROMPTS:
                 try:
                     logger.debug(
-                        cstr(
+                        _debug_fmt(
                             "[Metadata Debug] sampler_names empty in both pre-sampler and pre-this-node "
                             "captures; will fall back to scheduler if needed."
-                        ).msg,
+                        ),
                     )
                 except Exception:
                     pass  # Debug logging may fail - continue processing
@@ -1226,10 +1537,10 @@ class Capture:
             fallback_schedulers = inputs_before_this_node.get(MetaField.SCHEDULER, [])
             if fallback_schedulers:
                 schedulers = fallback_schedulers
-                if _debug_prompts_enabled():
+                if DEBUG_PROMPTS:
                     try:
                         logger.debug(
-                            cstr("[Metadata Debug] Recovered schedulers from inputs_before_this_node: %r").msg,
+                            _debug_fmt("[Metadata Debug] Recovered schedulers from inputs_before_this_node: %r"),
                             schedulers,
                         )
                     except Exception:
@@ -1237,80 +1548,76 @@ class Capture:
 
         # Direct graph introspection fallback: look into hook.current_prompt for KSamplerSelect / SamplerCustomAdvanced
         # nodes that expose a textual 'sampler_name' input but were not captured by rule scanning.
+        # Sampler-like graph nodes, filtered once and shared by both introspection passes below.
+        sampler_graph_nodes = None
+        # Set once the pass below has checked every KSamplerSelect / SamplerCustomAdvanced node without
+        # finding a textual sampler, so the later pass does not re-read those nodes.
+        select_nodes_exhausted = False
         if not sampler_names:
             try:
-                prompt_graph = getattr(hook, "current_prompt", {})
-                for nid, node_data in prompt_graph.items():
-                    if not isinstance(node_data, dict):
-                        continue
-                    ctype = str(node_data.get("class_type", ""))
+                sampler_graph_nodes = cls._sampler_graph_nodes(getattr(hook, "current_prompt", {}))
+                for nid, ctype, inputs_map in sampler_graph_nodes:
                     if "KSamplerSelect" not in ctype and "SamplerCustomAdvanced" not in ctype:
                         continue
-                    inputs_map = node_data.get("inputs", {}) or {}
                     raw_val = None
                     for key in ("sampler_name", "base_sampler", "sampler"):
                         if key in inputs_map:
                             raw_val = inputs_map[key]
                             break
-                    if isinstance(raw_val, list | tuple):  # noqa: UP038
+                    if isinstance(raw_val, _SEQ_TYPES):
                         raw_val = raw_val[0] if raw_val else None
                     if isinstance(raw_val, str) and raw_val.strip():
                         sampler_names = [(nid, raw_val, "sampler_name")]  # reshape to captured tuple form
-                        if _debug_prompts_enabled():
+                        if DEBUG_PROMPTS:
                             logger.debug(
-                                cstr("[Metadata Debug] Sampler name recovered via graph introspection from %s: %r").msg,
+                                _debug_fmt("[Metadata Debug] Sampler name recovered via graph introspection from %s: %r"),
                                 ctype,
                                 sampler_names,
                             )
                         break
+                else:
+                    select_nodes_exhausted = True
             except Exception as e:  # pragma: no cover
-                if _debug_prompts_enabled():
+                if DEBUG_PROMPTS:
                     logger.debug(
-                        cstr("[Metadata Debug] Graph introspection for sampler_name failed: %r").msg,
+                        _debug_fmt("[Metadata Debug] Graph introspection for sampler_name failed: %r"),
                         e,
                     )
 
         # Broad heuristic: if still no sampler names, scan every captured value for a known sampler token.
         if not sampler_names:
-            KNOWN_SAMPLER_TOKENS = {
-                "euler",
-                "euler_ancestral",
-                "heun",
-                "dpm_2",
-                "dpm_2_ancestral",
-                "lms",
-                "dpm_fast",
-                "dpm_adaptive",
-                "dpmpp_2s_ancestral",
-                "dpmpp_sde",
-                "dpmpp_sde_gpu",
-                "dpmpp_2m",
-                "dpmpp_2m_sde",
-                "dpmpp_2m_sde_gpu",
-                "dpmpp_3m_sde",
-                "dpmpp_3m_sde_gpu",
-                "lcm",
-                "ddim",
-                "plms",
-                "uni_pc",
-                "uni_pc_bh2",
-            }
 
-            def _scan_for_token(src_dict):
-                for vals in src_dict.values():
-                    for v in Capture._iter_values(vals):
-                        try:
-                            s = str(v).strip().lower()
-                        except Exception:
-                            continue
-                        if s in KNOWN_SAMPLER_TOKENS:
-                            return [("heuristic_sampler", v)]
+            def _find_sampler_token(src_dicts):
+                # Snapshots in priority order. Values are unpacked inline (same shapes as
+                # _extract_value) and only non-scalar objects are str()-coerced.
+                # Exact tokens across both snapshots win and return the original value; only then
+                # is a token embedded in free text (e.g. "sampler: euler") returned on its own.
+                # Prompts, model/file name fields and path-like values never feed the embedded pass.
+                embedded_candidates: list[str] = []
+                for src_dict in src_dicts:
+                    for meta, vals in src_dict.items():
+                        for entry in vals:
+                            if isinstance(entry, _SEQ_TYPES):
+                                if not entry:
+                                    continue
+                                v = entry[1] if len(entry) >= 2 else entry[0]
+                            else:
+                                v = entry
+                            if v is None or isinstance(v, (int, float)):
+                                continue  # numbers/None never stringify to a sampler token
+                            s = _safe_str(v).strip().lower()
+                            if s in _KNOWN_SAMPLER_TOKENS:
+                                return [("heuristic_sampler", v)]
+                            if meta not in _SAMPLER_EMBED_SKIP_FIELDS and "/" not in s and "\\" not in s:
+                                embedded_candidates.append(s)
+                for s in embedded_candidates:
+                    m = _SAMPLER_TOKEN_RE.search(s)
+                    if m:
+                        return [("heuristic_sampler", m.group(1))]
                 return []
 
-            sampler_names = _scan_for_token(inputs_before_sampler_node)
-            if not sampler_names:
-                sampler_names = _scan_for_token(inputs_before_this_node)
-            if sampler_names and _debug_prompts_enabled():
+            sampler_names = _find_sampler_token((inputs_before_sampler_node, inputs_before_this_node))
+            if sampler_names and DEBUG_PROMPTS:
                 logger.debug("[Metadata Debug] Heuristic sampler token recovered: %r", sampler_names)
 
         # Re-prioritize sampler_names: prefer entries whose field tag (3rd tuple element) is 'sampler_name'
@@ -1320,29 +1627,19 @@ class Capture:
             preferred: list[tuple] = []
             others: list[tuple] = []
             for ent in sampler_names:
-                try:
-                    node_id, val, field_name = ent  # expected tuple shape
-                except Exception:
+                if not (isinstance(ent, _SEQ_TYPES) and len(ent) == 3):  # expected tuple shape
                     others.append(ent)
                     continue
-                # Coerce to string for inspection but do not mutate original tuple
-                sval = None
-                if isinstance(val, str):
-                    sval = val
-                else:
-                    try:
-                        sval = str(val)
-                    except Exception:
-                        sval = ""
-                if (
-                    field_name == "sampler_name" and sval and not sval.strip().startswith("<")  # skip raw object reprs
-                ):
+                _, val, field_name = ent
+                # Only strings can be clean textual names; objects go to 'others' without building their repr,
+                # and raw object reprs are skipped
+                if field_name == "sampler_name" and isinstance(val, str) and val and not _is_object_repr(val):
                     preferred.append(ent)
                 else:
                     others.append(ent)
             if preferred:
                 sampler_names = preferred + others
-                if _debug_prompts_enabled():
+                if DEBUG_PROMPTS:
                     logger.debug(
                         "[Metadata Debug] Reordered sampler_names preferring textual sampler_name field: %r",
                         sampler_names,
@@ -1352,43 +1649,31 @@ class Capture:
         # try to recover one and inject it at the front so both civitai/non-civitai branches use it.
         def _first_clean_sampler_string(entries):
             for ent in entries or []:
-                try:
-                    val = ent[1] if isinstance(ent, list | tuple) and len(ent) > 1 else ent
-                except Exception:
-                    val = ent
-                if isinstance(val, str):
-                    sv = val.strip()
-                    if not (sv.startswith("<") and ">" in sv):
-                        return val
+                val = ent[1] if isinstance(ent, _SEQ_TYPES) and len(ent) > 1 else ent
+                if isinstance(val, str) and not _is_object_repr(val):
+                    return val
             return None
 
         clean_sampler_text = _first_clean_sampler_string(sampler_names)
         if not clean_sampler_text:
             # Attempt graph introspection specifically for nodes that expose a textual sampler name.
             try:
-                prompt_graph = getattr(hook, "current_prompt", {})
+                if sampler_graph_nodes is None:
+                    sampler_graph_nodes = cls._sampler_graph_nodes(getattr(hook, "current_prompt", {}))
                 recovered = None
                 recovered_nid = None
                 recovered_field = None
-                for nid, node_data in prompt_graph.items():
-                    if not isinstance(node_data, dict):
-                        continue
-                    ctype = str(node_data.get("class_type", ""))
-                    if (
-                        "KSamplerSelect" not in ctype
-                        and "SamplerCustomAdvanced" not in ctype
-                        and "KSamplerAdvanced" not in ctype
-                        and "KSampler" not in ctype
-                    ):
-                        continue
-                    inputs_map = node_data.get("inputs", {}) or {}
+                # Every node in the shared list matches KSampler* or SamplerCustomAdvanced.
+                for nid, ctype, inputs_map in sampler_graph_nodes:
+                    if select_nodes_exhausted and ("KSamplerSelect" in ctype or "SamplerCustomAdvanced" in ctype):
+                        continue  # already known to hold no textual sampler
                     raw_val = None
                     for key in ("sampler_name", "base_sampler", "sampler"):
                         if key in inputs_map:
                             raw_val = inputs_map[key]
                             recovered_field = key
                             break
-                    if isinstance(raw_val, list | tuple):
+                    if isinstance(raw_val, _SEQ_TYPES):
                         raw_val = raw_val[0] if raw_val else None
                     if isinstance(raw_val, str) and raw_val.strip():
                         recovered = raw_val
@@ -1397,7 +1682,7 @@ class Capture:
                 if recovered:
                     sampler_names = [(recovered_nid, recovered, recovered_field or "sampler_name")] + (sampler_names or [])
                     clean_sampler_text = recovered
-                    if _debug_prompts_enabled():
+                    if DEBUG_PROMPTS:
                         logger.debug(
                             "[Metadata Debug] Injected recovered textual sampler_name via introspection: %r",
                             sampler_names,
@@ -1415,7 +1700,7 @@ class Capture:
                         first_val = sampler_names[0]
                 if str(first_val) != str(clean_sampler_text):
                     sampler_names = [("derived", clean_sampler_text, "sampler_name")] + (sampler_names or [])
-                    if _debug_prompts_enabled():
+                    if DEBUG_PROMPTS:
                         logger.debug(
                             "[Metadata Debug] Prepending clean textual sampler to sampler_names: %r",
                             sampler_names,
@@ -1434,37 +1719,24 @@ class Capture:
                         sampler_val = sampler_names[0][1]
                     except Exception:
                         sampler_val = sampler_names[0]
-                    if not isinstance(sampler_val, str):
-                        try:
-                            sampler_val = str(sampler_val)
-                        except Exception:
-                            sampler_val = ""
+                    sampler_val = _safe_str(sampler_val)
                     # Sanitize object-like reprs such as '<comfy.samplers.KSAMPLER object ...>'
-                    if isinstance(sampler_val, str) and sampler_val.strip().startswith("<") and ">" in sampler_val:
+                    if _is_object_repr(sampler_val):
                         sampler_val = ""
                 pnginfo_dict["Sampler"] = sampler_val or ""
 
                 if len(schedulers) > 0:
-                    scheduler = schedulers[0][1]
-                    if not isinstance(scheduler, str):
-                        try:
-                            scheduler = str(scheduler)
-                        except Exception:
-                            scheduler = ""
+                    scheduler = _safe_str(schedulers[0][1]).lower()
                     if scheduler:
-                        try:
-                            scheduler = scheduler.lower()
-                        except Exception:
-                            pass  # Keep original scheduler if lowercasing fails
                         if pnginfo_dict["Sampler"]:
                             pnginfo_dict["Sampler"] = f"{pnginfo_dict['Sampler']}_{scheduler}"
                         else:
                             # If sampler name is unusable, fall back to just scheduler (e.g., 'normal')
                             pnginfo_dict["Sampler"] = scheduler
-                if _debug_prompts_enabled():
+                if DEBUG_PROMPTS:
                     try:
                         logger.debug(
-                            cstr("[Metadata Debug] Final non-Civitai Sampler value: %r").msg,
+                            _debug_fmt("[Metadata Debug] Final non-Civitai Sampler value: %r"),
                             pnginfo_dict.get("Sampler"),
                         )
                     except Exception:
@@ -1482,12 +1754,11 @@ class Capture:
             for src in (inputs_before_sampler_node, inputs_before_this_node):
                 vals = src.get(MetaField.WEIGHT_DTYPE, [])
                 for v in Capture._iter_values(vals):
-                    # Reuse sanitizer by calling update in a controlled way
-                    x = {MetaField.WEIGHT_DTYPE: [v]}
-                    update_pnginfo_dict(x, MetaField.WEIGHT_DTYPE, "Weight dtype")
-                    if "Weight dtype" in pnginfo_dict:
-                        # Pop and return, deferring insertion to a later stage
-                        return pnginfo_dict.pop("Weight dtype")
+                    # Same result as update_pnginfo_dict on a one-entry list, without the round trip
+                    # through pnginfo_dict; insertion is deferred to a later stage.
+                    sanitized = _sanitize_weight_dtype(Capture._extract_value(v))
+                    if sanitized is not None:
+                        return sanitized
             return None
 
         dtype_candidate = choose_weight_dtype()
@@ -1509,14 +1780,12 @@ class Capture:
         size_set = False
 
         def parse_dims_from_string(s):
-            try:
-                import re
-
-                nums = re.findall(r"\d+", str(s))
-                if len(nums) >= 2:
+            nums = _DIGIT_RUN_RE.findall(_safe_str(s))
+            if len(nums) >= 2:
+                try:
                     return int(nums[0]), int(nums[1])
-            except Exception:
-                pass  # Size string parsing may fail - return None
+                except ValueError:
+                    pass  # Digit runs beyond int's string-conversion limit
             return None
 
         if len(image_widths) > 0 and len(image_heights) > 0:
@@ -1551,17 +1820,9 @@ class Capture:
         else:
             # Some nodes provide a single dimensions/dimension like (W, H)
             dims = None
-            if (
-                len(image_widths) > 0
-                and isinstance(image_widths[0][1], tuple | list)  # noqa: UP038
-                and len(image_widths[0][1]) >= 2
-            ):
+            if len(image_widths) > 0 and isinstance(image_widths[0][1], _SEQ_TYPES) and len(image_widths[0][1]) >= 2:
                 dims = image_widths[0][1]
-            elif (
-                len(image_heights) > 0
-                and isinstance(image_heights[0][1], tuple | list)  # noqa: UP038
-                and len(image_heights[0][1]) >= 2
-            ):
+            elif len(image_heights) > 0 and isinstance(image_heights[0][1], _SEQ_TYPES) and len(image_heights[0][1]) >= 2:
                 dims = image_heights[0][1]
             elif len(image_widths) > 0 and isinstance(image_widths[0][1], str):
                 dims = parse_dims_from_string(image_widths[0][1])
@@ -1569,7 +1830,7 @@ class Capture:
                 dims = parse_dims_from_string(image_heights[0][1])
             if dims:
                 try:
-                    if isinstance(dims, tuple | list):  # noqa: UP038
+                    if isinstance(dims, _SEQ_TYPES):
                         w, h = int(dims[0]), int(dims[1])
                     else:
                         w, h = int(dims[0]), int(dims[1])
@@ -1585,31 +1846,26 @@ class Capture:
             def best_model_display(values):
                 # Prefer strings ending with common model extensions, else any string, else fallback to str of first
                 exts = pathresolve.SUPPORTED_MODEL_EXTENSIONS
-                str_candidates = []
+                first_str = None
                 for v in values:
                     try:
                         # If value is a tuple-like from odd loaders, consider first element
-                        if isinstance(v, tuple | list) and v:  # noqa: UP038
-                            v0 = v[0]
-                        else:
-                            v0 = v
+                        v0 = v[0] if isinstance(v, _SEQ_TYPES) and v else v
                         disp = display_model_name(v0)
                     except Exception:
-                        disp = None
+                        continue
                     if isinstance(disp, str) and disp:
-                        str_candidates.append(disp)
-                # Prefer those with known extensions
-                for s in str_candidates:
-                    ls = s.lower()
-                    if any(ls.endswith(e) for e in exts):
-                        return s
-                # Else any string candidate
-                if str_candidates:
-                    return str_candidates[0]
-                # Else fallback to raw string of first
-                return str(Capture._extract_value(model_names[0])) if model_names else None
-
-            m_disp = best_model_display([*Capture._iter_values(model_names)])
+                        if disp.lower().endswith(exts):
+                            return disp
+                        if first_str is None:
+                            first_str = disp
+                if first_str is not None:
+                    return first_str
+                # Else fallback to raw string of first (model_names is non-empty here)
+                return str(Capture._extract_value(model_names[0]))
+
+            # Consume the generator directly; the early return stops at the first model-file name.
+            m_disp = best_model_display(Capture._iter_values(model_names))
             if m_disp:
                 pnginfo_dict["Model"] = m_disp
         update_pnginfo_dict(inputs_before_sampler_node, MetaField.MODEL_HASH, "Model hash")
@@ -1619,7 +1875,7 @@ class Capture:
                 mdisp = pnginfo_dict["Model"]
                 mdisp_l = mdisp.lower() if isinstance(mdisp, str) else ""
                 looks_like_file = isinstance(mdisp, str) and (
-                    "\\" in mdisp or "/" in mdisp or any(mdisp_l.endswith(ext) for ext in pathresolve.SUPPORTED_MODEL_EXTENSIONS)
+                    "\\" in mdisp or "/" in mdisp or mdisp_l.endswith(pathresolve.SUPPORTED_MODEL_EXTENSIONS)
                 )
                 if looks_like_file:
                     # Try UNet first (Flux et al.), then checkpoint
@@ -1634,31 +1890,15 @@ class Capture:
         # Insert Weight dtype right after Model/Model hash, before shifts
         if dtype_candidate is None and isinstance(pnginfo_dict.get("Model"), str):
             # Heuristic fallback: infer dtype from model filename
-            m = pnginfo_dict["Model"].lower()
-            inferred = None
-            if "fp8" in m and ("e4m3fn" in m or "e5m2" in m):
-                inferred = "fp8_e4m3fn" if "e4m3fn" in m else "fp8_e5m2"
-                if "fast" in m or "turbo" in m:
-                    if "e4m3fn" in m:
-                        inferred = "fp8_e4m3fn_fast"
-            elif "bf16" in m or "bfloat16" in m:
-                inferred = "bf16"
-            elif "fp16" in m or "float16" in m or "f16" in m:
-                inferred = "fp16"
-            elif "float32" in m or "f32" in m:
-                inferred = "float32"
-            elif "int8" in m or "q8" in m or "qint8" in m:
-                inferred = "int8"
-            elif "int4" in m or "q4" in m or "qint4" in m or "nf4" in m:
-                inferred = "int4"
-            dtype_candidate = inferred
+            dtype_candidate = _infer_dtype_from_model_name(pnginfo_dict["Model"].lower())
 
         if dtype_candidate is not None:
             pnginfo_dict["Weight dtype"] = dtype_candidate
 
-        update_pnginfo_dict(inputs_before_sampler_node, MetaField.MAX_SHIFT, "Max shift")
-        update_pnginfo_dict(inputs_before_sampler_node, MetaField.BASE_SHIFT, "Base shift")
-        update_pnginfo_dict(inputs_before_sampler_node, MetaField.SHIFT, "Shift")
+        for metafield, key in _SHIFT_PNGINFO_FIELDS:
+            # Shift fields are absent for most models; skip the helper call entirely then
+            if inputs_before_sampler_node.get(metafield):
+                update_pnginfo_dict(inputs_before_sampler_node, metafield, key)
         # update_pnginfo_dict(inputs_before_sampler_node, MetaField.CLIP_1, "Clip 1")
         # update_pnginfo_dict(inputs_before_sampler_node, MetaField.CLIP_2, "Clip 2")
         clip_models = inputs_before_sampler_node.get(MetaField.CLIP_MODEL_NAME, [])
@@ -1697,13 +1937,13 @@ class Capture:
                         continue
                     s = str(disp)
                     # Reject object-like reprs such as '<comfy.sd.VAE object ...>'
-                    if s.strip().startswith("<") and ">" in s:
+                    if _is_object_repr(s):
                         continue
                     return s
                 # Fallback to raw string if first list had no good display
                 try:
                     raw = str(Capture._extract_value(vae_names[0]))
-                    if not (raw.strip().startswith("<") and ">" in raw):
+                    if not _is_object_repr(raw):
                         return raw
                 except Exception:
                     pass  # VAE name extraction may fail - return None
@@ -1714,13 +1954,8 @@ class Capture:
             pnginfo_dict["VAE"] = v_disp
         update_pnginfo_dict(inputs_before_this_node, MetaField.VAE_HASH, "VAE hash")
         # If VAE hash captured as an object-like repr, discard so we can compute a clean hash below
-        if "VAE hash" in pnginfo_dict:
-            try:
-                _vh = str(pnginfo_dict["VAE hash"]).strip()
-                if _vh.startswith("<") and ">" in _vh:
-                    pnginfo_dict.pop("VAE hash", None)
-            except Exception:
-                pass  # VAE hash validation may fail - keep existing value
+        if "VAE hash" in pnginfo_dict and _is_object_repr(_safe_str(pnginfo_dict["VAE hash"])):
+            pnginfo_dict.pop("VAE hash", None)
         if "VAE hash" not in pnginfo_dict and "VAE" in pnginfo_dict:
             try:
                 h = calc_vae_hash(pnginfo_dict["VAE"], None)
@@ -1736,7 +1971,7 @@ class Capture:
 
         hashes_for_civitai = cls.get_hashes_for_civitai(inputs_before_sampler_node, inputs_before_this_node, pnginfo_dict, lora_records)
         if len(hashes_for_civitai) > 0:
-            pnginfo_dict["Hashes"] = json.dumps(hashes_for_civitai)
+            pnginfo_dict["Hashes"] = json.dumps(hashes_for_civitai, separators=(",", ":"))
 
         # Civitai-compatible LoRA hashes and strengths (for lora_strengths_in_prompt)
         lora_hash_entries, lora_strength_entries = cls.gen_civitai_lora_hashes_and_strengths(
@@ -1749,9 +1984,8 @@ class Capture:
 
         # (dtype heuristic fallback already handled earlier when inserting Weight dtype)
 
-        # Add structured hash detail section prior to returning (respect dynamic feature flag)
-        if _include_hash_detail():
-            cls.add_hash_detail_section(pnginfo_dict)
+        # Add structured hash detail section prior to returning (the method checks the dynamic feature flag)
+        cls.add_hash_detail_section(pnginfo_dict)
 
         return pnginfo_dict
 
@@ -1800,17 +2034,20 @@ class Capture:
         # --- Prompt header reconstruction (robust dual-encoder handling) ---
         pos = (pnginfo_dict.get("Positive prompt", "") or "").rstrip("\r\n")
         neg = (pnginfo_dict.get("Negative prompt", "") or "").rstrip("\r\n")
-        DEBUG_PROMPTS = os.environ.get("METADATA_DEBUG_PROMPTS", "").strip() != ""  # noqa: N806
+        DEBUG_PROMPTS = _debug_prompts_enabled()  # noqa: N806
 
         # Case-insensitive search for dual prompt keys to be resilient to prior casing differences.
-        def _find_ci(target_lower):
-            for k, v in pnginfo_dict.items():
-                if k.lower() == target_lower:
-                    return v
-            return None
-
-        t5 = _find_ci("t5 prompt")  # was duplicated: or _find_ci("t5 prompt")
-        clip = _find_ci("clip prompt")
+        # One case-insensitive pass for both dual prompt keys; the first matching key wins.
+        # Every spelling found is remembered so the field listing below can exclude it.
+        dual_prompts: dict[str, Any] = {}
+        dual_prompt_keys: list[str] = []
+        for k, v in pnginfo_dict.items():
+            lk = k.lower()
+            if lk in ("t5 prompt", "clip prompt"):
+                dual_prompt_keys.append(k)
+                dual_prompts.setdefault(lk, v)
+        t5 = dual_prompts.get("t5 prompt")
+        clip = dual_prompts.get("clip prompt")
 
         # Only keep T5/CLIP if BOTH exist (true dual-encoder like Flux)
         if not (t5 and clip):
@@ -1825,14 +2062,8 @@ class Capture:
         header_lines = []
         if t5 is not None and clip is not None:
             # Dual prompt scenario: suppress unified positive prompt completely, always label.
-            try:
-                t5s = t5.rstrip("\r\n") if isinstance(t5, str) else str(t5)
-            except Exception:
-                t5s = str(t5)
-            try:
-                clips = clip.rstrip("\r\n") if isinstance(clip, str) else str(clip)
-            except Exception:
-                clips = str(clip)
+            t5s = t5.rstrip("\r\n") if isinstance(t5, str) else _safe_str(t5)
+            clips = clip.rstrip("\r\n") if isinstance(clip, str) else _safe_str(clip)
             header_lines.append(f"T5 Prompt: {t5s}")
             header_lines.append(f"CLIP Prompt: {clips}")
         else:
@@ -1858,16 +2089,8 @@ class Capture:
         if DEBUG_PROMPTS:
             logger.debug("[Metadata Debug] Final header lines (joined):\n%s", prompt_header_block)
 
-        exclude_keys = {
-            "Positive prompt",
-            "T5 Prompt",
-            "CLIP Prompt",
-            "Negative prompt",
-        }
-        # Also exclude any residual lowercase variants that might slip through
-        for k in list(pnginfo_dict.keys()):
-            if k.lower() in {"t5 prompt", "clip prompt"}:
-                exclude_keys.add(k)
+        # Also exclude any residual lowercase variants that might slip through; only those need a new set
+        exclude_keys = _PARAMETERS_HEADER_KEYS.union(dual_prompt_keys) if dual_prompt_keys else _PARAMETERS_HEADER_KEYS
         metadata_fields = {k: v for k, v in pnginfo_dict.items() if k not in exclude_keys}
         # Pull out metadata generator version to force it last later
         metadata_version = metadata_fields.pop("Metadata generator version", None)
@@ -1875,7 +2098,7 @@ class Capture:
         extra_metadata_keys: list[str] = []
         if extra_metadata_keys_raw is not None:
             # Normalize to a list: list/tuple stay as-is; other values (str, int, etc.) become single-element lists.
-            candidates = list(extra_metadata_keys_raw) if isinstance(extra_metadata_keys_raw, list | tuple) else [extra_metadata_keys_raw]
+            candidates = list(extra_metadata_keys_raw) if isinstance(extra_metadata_keys_raw, _SEQ_TYPES) else [extra_metadata_keys_raw]
             seen_extra_keys: set[str] = set()
             for candidate in candidates:
                 if candidate is None:
@@ -1951,67 +2174,40 @@ class Capture:
         for key in primary_order:
             append_if_present(key)
 
-        import re
-
-        def _make_suffix_sorter(sub_order: list[str]):
-            """Return a sort key function that orders strings by suffix match against sub_order."""
-            def sort_key(name: str) -> int:
-                for sub_index, suffix in enumerate(sub_order):
-                    if name.endswith(suffix):
-                        return sub_index
-                return len(sub_order)
-            return sort_key
-
-        # LoRA grouped fields
-        lora_pattern = re.compile(r"^Lora_(\d+) ")
-        lora_groups: dict[int, list[str]] = {}
-        for key in metadata_fields.keys():
-            match = lora_pattern.match(key)
-            if match:
-                idx = int(match.group(1))
-                lora_groups.setdefault(idx, []).append(key)
-        for idx in sorted(lora_groups.keys()):
-            sub_order = ["Model name", "Model hash", "Strength model", "Strength clip"]
-            keys = lora_groups[idx]
-
-            for key in sorted(keys, key=_make_suffix_sorter(sub_order)):
-                if key not in ordered_labels:
-                    ordered_fields.append((key, metadata_fields[key]))
-                    ordered_labels.add(key)
-
-        # Embedding grouped fields
-        emb_pattern = re.compile(r"^Embedding_(\d+) ")
-        emb_groups: dict[int, list[str]] = {}
-        for key in metadata_fields.keys():
-            match = emb_pattern.match(key)
-            if match:
-                idx = int(match.group(1))
-                emb_groups.setdefault(idx, []).append(key)
-        for idx in sorted(emb_groups.keys()):
-            sub_order = ["name", "hash"]
-            keys = emb_groups[idx]
-
-            for key in sorted(keys, key=_make_suffix_sorter(sub_order)):
-                if key not in ordered_labels:
-                    ordered_fields.append((key, metadata_fields[key]))
-                    ordered_labels.add(key)
-
-        # CLIP grouped fields
-        clip_pattern = re.compile(r"^CLIP_(\d+) ")
-        clip_groups: dict[int, list[str]] = {}
-        for key in metadata_fields.keys():
-            match = clip_pattern.match(key)
-            if match:
-                idx = int(match.group(1))
-                clip_groups.setdefault(idx, []).append(key)
-        for idx in sorted(clip_groups.keys()):
-            sub_order = ["Model name", "Model hash"]
-            keys = clip_groups[idx]
-
-            for key in sorted(keys, key=_make_suffix_sorter(sub_order)):
-                if key not in ordered_labels:
-                    ordered_fields.append((key, metadata_fields[key]))
-                    ordered_labels.add(key)
+        # Bucket the indexed LoRA / Embedding / CLIP keys by slot in a single pass over the fields.
+        # Each slot holds one position per ranked field suffix, so no per-slot sort is needed;
+        # unranked (or colliding) keys follow in field order.
+        lora_groups: dict[int, list[str | None]] = {}
+        emb_groups: dict[int, list[str | None]] = {}
+        clip_groups: dict[int, list[str | None]] = {}
+        # Plain string slicing instead of a regex per key: "<Prefix>_<digits> <rest>".
+        for key in metadata_fields:
+            if key.startswith("Lora_"):
+                tail, groups, ranks = key[5:], lora_groups, _LORA_FIELD_RANK
+            elif key.startswith("Embedding_"):
+                tail, groups, ranks = key[10:], emb_groups, _EMBEDDING_FIELD_RANK
+            elif key.startswith("CLIP_"):
+                tail, groups, ranks = key[5:], clip_groups, _CLIP_FIELD_RANK
+            else:
+                continue
+            slot, sep, rest = tail.partition(" ")
+            if sep and slot.isdecimal():
+                entry = groups.get(int(slot))
+                if entry is None:
+                    entry = groups[int(slot)] = [None] * len(ranks)
+                rank = ranks.get(rest)
+                if rank is None or entry[rank] is not None:
+                    entry.append(key)
+                else:
+                    entry[rank] = key
+
+        # LoRA, then Embedding, then CLIP grouped fields
+        for groups in (lora_groups, emb_groups, clip_groups):
+            for idx in sorted(groups):
+                for key in groups[idx]:
+                    if key is not None and key not in ordered_labels:
+                        ordered_fields.append((key, metadata_fields[key]))
+                        ordered_labels.add(key)
 
         # Remaining keys
         remaining = [key for key in metadata_fields.keys() if key not in ordered_labels]
@@ -2064,17 +2260,19 @@ class Capture:
             "Batch index",
             "Batch size",
         ]
-        present_keys = {k for k, _ in ordered_fields}
+        # ordered_labels already tracks every emitted key (the version entry is not a critical field)
         for cf in critical_fields:
-            if cf in metadata_fields and cf not in present_keys:
+            if cf in metadata_fields and cf not in ordered_labels:
                 ordered_fields.insert(0, (cf, metadata_fields[cf]))  # Prepend to emphasize core params
 
         # Inject LoRA summary (optional) before Hashes entry if any LoRAs exist
-        if include_lora_summary_override is True or (include_lora_summary_override is None and _include_lora_summary()):
+        if include_lora_summary:
             try:
                 lora_names: list[str] = []
-                lora_index = 0
-                while True:
+                # Slots come from the grouping pass above; stop at the first gap like the old probe loop.
+                for expected_index, lora_index in enumerate(sorted(lora_groups)):
+                    if lora_index != expected_index:
+                        break
                     model_name_key = f"Lora_{lora_index} Model name"
                     if model_name_key not in pnginfo_dict:
                         break
@@ -2083,19 +2281,14 @@ class Capture:
                     if strength_value is None:
                         strength_value = pnginfo_dict.get(f"Lora_{lora_index} Strength clip")
                     if name:
-                        try:
-                            sval = (
-                                f"{float(strength_value):.3g}"
-                                if isinstance(strength_value, int | float)  # noqa: UP038
-                                else (str(strength_value) if strength_value is not None else "")
-                            )
-                        except Exception:
-                            sval = str(strength_value) if strength_value is not None else ""
+                        if isinstance(strength_value, (int, float)):
+                            sval = f"{float(strength_value):.3g}"
+                        else:
+                            sval = _safe_str(strength_value)
                         if sval:
                             lora_names.append(f"{name}: str_{sval}")
                         else:
                             lora_names.append(str(name))
-                    lora_index += 1
                 if lora_names:
                     # Find index of Hashes if present
                     hashes_idx = None
@@ -2114,16 +2307,15 @@ class Capture:
             ordered_fields = [item for item in ordered_fields if item[0] != "Metadata generator version"]
             ordered_fields.append(("Metadata generator version", metadata_version))
 
-        TEST_MODE = bool(os.environ.get("METADATA_TEST_MODE"))  # noqa: N806 - narrow scope, keep style
+        TEST_MODE = _envflag("METADATA_TEST_MODE")  # noqa: N806 - narrow scope, keep style
         multiline = TEST_MODE  # Only multiline in test mode to satisfy snapshot tests
 
-        parts: list[str] = []
-        for k, v in ordered_fields:
-            try:
-                s = str(v).strip().replace("\n", " ")
-            except Exception:
-                s = str(v)
-            parts.append(f"{k}: {s}")
+        def _field_text(v):
+            # Most values are already str; only copy when there is a newline to flatten
+            s = (v if type(v) is str else str(v)).strip()
+            return s.replace("\n", " ") if "\n" in s else s
+
+        parts = [f"{k}: {_field_text(v)}" for k, v in ordered_fields]
 
         # Multi-sampler tail augmentation: only if >1 sampler candidate
         tail = ""
@@ -2152,28 +2344,13 @@ class Capture:
             except Exception:
                 tail = ""
 
-        def _normalize_newlines(s: str) -> str:
-            # Normalize CRLF and collapse duplicate blank lines conservatively
-            try:
-                s = s.replace("\r\n", "\n")
-            except Exception:
-                # Best-effort normalization; ignore errors if input is not a string or replace fails.
-                pass
-            # Collapse doubled newlines that can arise from mixed sources
-            # (do not attempt to preserve intentional >2 line breaks)
-            try:
-                while "\n\n" in s:
-                    s = s.replace("\n\n", "\n")
-            except Exception:
-                # Intentionally ignore errors during newline normalization; fallback to original string.
-                pass
-            return s
-
-        if multiline:
-            return _normalize_newlines(prompt_header_block + "\n".join(parts) + tail)
-        else:
-            # Legacy Automatic1111-style: single parameter line (after prompts / negative)
-            return _normalize_newlines(prompt_header_block + ", ".join(parts) + tail)
+        # Multiline in test mode; otherwise the legacy Automatic1111-style single
+        # parameter line (after prompts / negative).
+        separator = "\n" if multiline else ", "
+        result = "".join((prompt_header_block, separator.join(parts), tail))
+        # Normalize CRLF, then collapse runs of newlines that can arise from mixed
+        # sources in one pass (intentional >2 line breaks are not preserved).
+        return _NEWLINE_RUN_RE.sub("\n", result.replace("\r\n", "\n"))
 
     @classmethod
     def add_hash_detail_section(cls, pnginfo_dict):
@@ -2239,7 +2416,7 @@ class Capture:
                 )
                 embedding_index += 1
             try:
-                pnginfo_dict["Hash detail"] = json.dumps(hash_detail_payload, sort_keys=True)
+                pnginfo_dict["Hash detail"] = _HASH_DETAIL_ENCODER.encode(hash_detail_payload)
             except Exception:
                 pnginfo_dict["Hash detail"] = str(hash_detail_payload)
         except Exception as e:
@@ -2282,7 +2459,7 @@ class Capture:
                 if not v or v.upper() == "N/A":
                     return
                 # Ignore object-like placeholders such as '<comfy.sd.VAE object at ...>'
-                if v.startswith("<") and ">" in v:
+                if _is_object_repr(v):
                     return
                 if not cls._looks_like_hex_hash(v):
                     return
@@ -2507,7 +2684,7 @@ class Capture:
 
         def to_float_or_none(x):
             try:
-                if isinstance(x, int | float):  # noqa: UP038
+                if isinstance(x, (int, float)):
                     return float(x)
                 if isinstance(x, str):
                     xs = x.strip()
@@ -2519,7 +2696,7 @@ class Capture:
             return None
 
         def _entry_node_id(item) -> str:
-            if isinstance(item, list | tuple) and item:
+            if isinstance(item, _SEQ_TYPES) and item:
                 try:
                     return str(item[0])
                 except Exception:
@@ -2536,7 +2713,7 @@ class Capture:
             return text or None
 
         def _entry_source_tag(item) -> str | None:
-            if isinstance(item, list | tuple) and len(item) >= 3:
+            if isinstance(item, _SEQ_TYPES) and len(item) >= 3:
                 return _normalize_source_tag(item[2])
             return None
 
@@ -2584,7 +2761,7 @@ class Capture:
                 lookup_token = value
                 tuple_sm = None
                 tuple_sc = None
-                if isinstance(value, tuple | list) and value:  # noqa: UP038
+                if isinstance(value, _SEQ_TYPES) and value:
                     raw_path = value[0]
                     lookup_token = raw_path
                     if len(value) >= 2:
@@ -2759,25 +2936,22 @@ class Capture:
             for v in vals:
                 try:
                     node_ref = None
-                    if isinstance(v, list | tuple) and v:
+                    if isinstance(v, _SEQ_TYPES) and v:
                         node_ref = str(v[0])
                     if node_ref is None or node_ref not in inline_sources:
                         continue
                     s = Capture._extract_value(v)
-                    if isinstance(s, str) and "<lora:" in s.lower():
+                    # A complete tag needs a closing '>'; check that before paying for the lowered copy
+                    if isinstance(s, str) and ">" in s and "<lora:" in s.lower():
                         aggregated_text_candidates.append(s)
                 except Exception as e:
                     logging.debug("Failed to extract LoRA from prompt value %r: %s", v, e)
         if not aggregated_text_candidates:
             return existing
 
-        pattern = re.compile(
-            r"<lora:([^:>]+):([0-9]*\.?[0-9]+)(?::([0-9]*\.?[0-9]+))?>",
-            re.IGNORECASE,
-        )
         compare_keys = {cls._normalize_lora_key(rec.name) for rec in existing}
         for blob in aggregated_text_candidates:
-            for name, ms_str, cs_str in pattern.findall(blob):
+            for name, ms_str, cs_str in _PROMPT_LORA_TAG_RE.findall(blob):
                 try:
                     ms = float(ms_str)
                 except Exception:
@@ -2908,41 +3082,7 @@ class Capture:
             str: Formatted sampler value (may be empty when none qualify).
         """
 
-        civitai_sampler_map = {
-            "euler_ancestral": "Euler a",
-            "euler": "Euler",
-            "lms": "LMS",
-            "heun": "Heun",
-            "dpm_2": "DPM2",
-            "dpm_2_ancestral": "DPM2 a",
-            "dpmpp_2s_ancestral": "DPM++ 2S a",
-            "dpmpp_2m": "DPM++ 2M",
-            "dpmpp_sde": "DPM++ SDE",
-            "dpmpp_2m_sde": "DPM++ 2M SDE",
-            "dpmpp_3m_sde": "DPM++ 3M SDE",
-            "dpm_fast": "DPM fast",
-            "dpm_adaptive": "DPM adaptive",
-            "lms_karras": "LMS Karras",
-            "dpm_2_karras": "DPM2 Karras",
-            "dpm_2_ancestral_karras": "DPM2 a Karras",
-            "dpmpp_2s_ancestral_karras": "DPM++ 2S a Karras",
-            "dpmpp_2m_karras": "DPM++ 2M Karras",
-            "dpmpp_sde_karras": "DPM++ SDE Karras",
-            "dpmpp_2m_sde_karras": "DPM++ 2M SDE Karras",
-            "dpmpp_3m_sde_karras": "DPM++ 3M SDE Karras",
-            "dpmpp_3m_sde_exponential": "DPM++ 3M SDE Exponential",
-            "ddim": "DDIM",
-            "plms": "PLMS",
-            "uni_pc": "UniPC",
-            "uni_pc_bh2": "UniPC",
-            "lcm": "LCM",
-        }
-        sampler_aliases = {
-            "euler_cfg_pp": "euler",
-            "euler_ancestral_cfg_pp": "euler_ancestral",
-            "heunpp2": "heun",
-        }
-
+        DEBUG_PROMPTS = _debug_prompts_enabled()  # noqa: N806
         # Choose sampler and scheduler from provided candidates
         sampler = None
         scheduler = None
@@ -2954,34 +3094,26 @@ class Capture:
                 try:
                     nid, val, tag = ent[:3]
                 except Exception:
-                    val = ent[1] if isinstance(ent, list | tuple) and len(ent) > 1 else ent
+                    val = ent[1] if isinstance(ent, _SEQ_TYPES) and len(ent) > 1 else ent
                     tag = None
-                sval = None
-                if isinstance(val, str):
-                    sval = val
-                else:
-                    try:
-                        sval = str(val)
-                    except Exception:
-                        sval = None
-                if sval and not (sval.strip().startswith("<") and ">" in sval) and (tag == "sampler_name"):
+                sval = _safe_str(val)
+                if sval and not _is_object_repr(sval) and (tag == "sampler_name"):
                     chosen = sval
                     break
             # Next, any clean string in order
             if not chosen:
                 for ent in sampler_names:
-                    val = ent[1] if isinstance(ent, list | tuple) and len(ent) > 1 else ent
-                    if isinstance(val, str):
-                        sval = val.strip()
-                        if sval and not (sval.startswith("<") and ">" in sval):
-                            chosen = val
-                            break
+                    val = ent[1] if isinstance(ent, _SEQ_TYPES) and len(ent) > 1 else ent
+                    # Non-blank (no strip copy needed) and not an object repr
+                    if isinstance(val, str) and val and not val.isspace() and not _is_object_repr(val):
+                        chosen = val
+                        break
             try:
                 if chosen is not None:
                     sampler = chosen
                 else:
                     first = sampler_names[0]
-                    if isinstance(first, list | tuple) and len(first) > 1:
+                    if isinstance(first, _SEQ_TYPES) and len(first) > 1:
                         sampler = first[1]
                     else:
                         sampler = first
@@ -3014,10 +3146,10 @@ class Capture:
 
         sampler = _unwrap(sampler)
         scheduler = _unwrap(scheduler)
-        if _debug_prompts_enabled():
+        if DEBUG_PROMPTS:
             try:
                 logger.debug(
-                    cstr("[Metadata Debug] Civitai mapper unwrapped sampler=%r scheduler=%r (pre-scan)").msg,
+                    _debug_fmt("[Metadata Debug] Civitai mapper unwrapped sampler=%r scheduler=%r (pre-scan)"),
                     sampler,
                     scheduler,
                 )
@@ -3040,7 +3172,7 @@ class Capture:
         if not sampler and sampler_names:
             raw_entry = sampler_names[0]
             try:
-                raw_value = raw_entry[1] if isinstance(raw_entry, list | tuple) and len(raw_entry) > 1 else raw_entry
+                raw_value = raw_entry[1] if isinstance(raw_entry, _SEQ_TYPES) and len(raw_entry) > 1 else raw_entry
             except Exception:
                 raw_value = raw_entry
             # Attempt to mine known sampler tokens from attributes / __dict__
@@ -3090,18 +3222,20 @@ class Capture:
             if not token:
                 return None
             normalized = token.strip().lower()
-            normalized = normalized.replace("_gpu_karras", "_karras")
-            normalized = normalized.replace("_gpu_exponential", "_exponential")
-            if normalized.endswith("_gpu"):
-                normalized = normalized[:-4]
-            return sampler_aliases.get(normalized, normalized)
+            # Every GPU-variant rewrite involves "_gpu"; most tokens skip all three.
+            if "_gpu" in normalized:
+                normalized = normalized.replace("_gpu_karras", "_karras")
+                normalized = normalized.replace("_gpu_exponential", "_exponential")
+                if normalized.endswith("_gpu"):
+                    normalized = normalized[:-4]
+            return _CIVITAI_SAMPLER_ALIASES.get(normalized, normalized)
 
         sampler_l = normalize_sampler_token(sampler)
         scheduler_l = scheduler.lower() if scheduler else None
-        if _debug_prompts_enabled():
+        if DEBUG_PROMPTS:
             try:
                 logger.debug(
-                    cstr("[Metadata Debug] Civitai mapper tokens sampler_l=%r scheduler_l=%r").msg,
+                    _debug_fmt("[Metadata Debug] Civitai mapper tokens sampler_l=%r scheduler_l=%r"),
                     sampler_l,
                     scheduler_l,
                 )
@@ -3110,36 +3244,36 @@ class Capture:
 
         # Do not fabricate a placeholder sampler when none can be determined; prefer scheduler-only fallback.
         if not sampler:
-            if _debug_prompts_enabled():
+            if DEBUG_PROMPTS:
                 logger.debug(
-                    cstr("[Metadata Debug] Civitai mapper: missing sampler; returning scheduler=%r").msg,
+                    _debug_fmt("[Metadata Debug] Civitai mapper: missing sampler; returning scheduler=%r"),
                     scheduler,
                 )
             return scheduler or ""
 
-        if _debug_prompts_enabled():
-            logger.debug(cstr("[Metadata Debug] Civitai mapper: matching sampler '%s'").msg, sampler_l)
+        if DEBUG_PROMPTS:
+            logger.debug(_debug_fmt("[Metadata Debug] Civitai mapper: matching sampler '%s'"), sampler_l)
 
         if scheduler_l and scheduler_l != "normal":
             combined_token = f"{sampler_l}_{scheduler_l}"
-            combined_match = civitai_sampler_map.get(combined_token)
+            combined_match = _CIVITAI_SAMPLER_MAP.get(combined_token)
             if combined_match:
                 return combined_match
 
-        sampler_match = civitai_sampler_map.get(sampler_l)
+        sampler_match = _CIVITAI_SAMPLER_MAP.get(sampler_l)
         if sampler_match:
             return sampler_match
 
         # Fallback: include scheduler suffix when present and not 'normal'
         if not scheduler_l or scheduler_l == "normal":
-            if _debug_prompts_enabled():
+            if DEBUG_PROMPTS:
                 logger.debug(
-                    cstr("[Metadata Debug] Civitai mapper: final result '%s'").msg,
+                    _debug_fmt("[Metadata Debug] Civitai mapper: final result '%s'"),
                     sampler or "",
                 )
             return sampler or ""
         # Only append scheduler if we have a real sampler string (avoid leading underscore)
         res = f"{sampler}_{scheduler_l}" if sampler else (scheduler or "")
-        if _debug_prompts_enabled():
-            logger.debug(cstr("[Metadata Debug] Civitai mapper: final result '%s'").msg, res)
+        if DEBUG_PROMPTS:
+            logger.debug(_debug_fmt("[Metadata Debug] Civitai mapper: final result '%s'"), res)
         return res
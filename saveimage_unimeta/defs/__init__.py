@@ -62,6 +62,9 @@ else:  # Provide minimal placeholders sufficient for tests importing enums/utili
 
 FORCED_INCLUDE_CLASSES: set[str] = set()
 LOADED_RULES_VERSION: str | None = None
+# Bumped whenever the loaders rebuild or merge into CAPTURE_FIELD_LIST so consumers
+# caching derived views (capture's normalized rule table) know to rebuild them.
+RULES_REVISION: int = 0
 
 
 def set_forced_include(raw: str) -> set[str]:
@@ -98,6 +101,7 @@ __all__ = [
     "CAPTURE_FIELD_LIST",
     "FORCED_INCLUDE_CLASSES",
     "LOADED_RULES_VERSION",
+    "RULES_REVISION",
     "set_forced_include",
     "clear_forced_include",
     # Submodules expected to be importable via package (tests rely on this)
@@ -118,8 +122,9 @@ def _reset_to_defaults() -> None:
     CAPTURE_FIELD_LIST.clear()
     SAMPLERS.update(DEFAULT_SAMPLERS)
     CAPTURE_FIELD_LIST.update(DEFAULT_CAPTURES)
-    global LOADED_RULES_VERSION
+    global LOADED_RULES_VERSION, RULES_REVISION
     LOADED_RULES_VERSION = None
+    RULES_REVISION += 1
 
 
 def _load_extensions() -> None:
@@ -226,6 +231,8 @@ def _merge_extension_capture_entry(node_name: str, rules) -> None:
         node_name (str): The name of the node the rule applies to.
         rules (dict): The dictionary of rules to be merged.
     """
+    global RULES_REVISION
+    RULES_REVISION += 1
     existing = CAPTURE_FIELD_LIST.get(node_name)
     if (
         node_name not in CAPTURE_FIELD_LIST
@@ -248,6 +255,8 @@ def _merge_user_capture_entry(node_name: str, rules, allowed: set[str] | None) -
     """
     if allowed is not None and node_name not in allowed and node_name not in CAPTURE_FIELD_LIST:
         return
+    global RULES_REVISION
+    RULES_REVISION += 1
     container = CAPTURE_FIELD_LIST.setdefault(node_name, {})
     if isinstance(container, MutableMapping) and isinstance(rules, Mapping):
         container.update(rules)
@@ -4,7 +4,7 @@ import math
 
 
 def _coerce_first(value):
-    if isinstance(value, list | tuple):  # noqa: UP038
+    if isinstance(value, (list, tuple)):
         return value[0] if value else None
     return value
 
@@ -78,6 +78,7 @@ from ..defs.captures import CAPTURE_FIELD_LIST
 from ..defs.samplers import SAMPLERS
 from ..defs.meta import MetaField
 from .. import defs as defs_mod
+from .. import _envflag
 
 logger = logging.getLogger(__name__)
 _DEBUG_VERBOSE = os.environ.get("METADATA_DEBUG", "0") not in ("0", "false", "False", None, "")
@@ -1358,8 +1359,7 @@ class MetadataRuleScanner:
 
         base_result = (pretty_json, diff_report)
 
-        env = os.environ
-        if not env.get("PYTEST_CURRENT_TEST") and not env.get("METADATA_TEST_MODE"):
+        if not os.environ.get("PYTEST_CURRENT_TEST") and not _envflag("METADATA_TEST_MODE"):
             try:
                 return {
                     "ui": {"scan_results": [pretty_json], "diff_report": [diff_report]},
@@ -0,0 +1,100 @@
+"""Auto-generated metadata rule extension for SaveImageWithMetaDataUniversal.
+
+This module is written by the Metadata Rule Scanner / Save Custom Metadata Rules nodes when you click
+"Save Generated User Rules" or restore a scanner backup.
+It mirrors the merged contents of `user_captures.json` and `user_samplers.json`.
+This lets metadata loading import a fast Python module instead of reparsing JSON on every run.
+Manual edits will be overwritten whenever the generator runs, so adjust the JSON files
+or rerun the scanner instead of editing this file directly.
+Treat this as a build artifact you can always regenerate.
+"""
+
+from ..meta import MetaField
+from ..formatters import (
+    calc_model_hash, calc_vae_hash, calc_lora_hash, calc_unet_hash,
+    convert_skip_clip, get_scaled_width, get_scaled_height,
+    extract_embedding_names, extract_embedding_hashes
+)
+from ..validators import (
+    is_positive_prompt, is_negative_prompt
+)
+from ..selectors import (
+    select_stack_by_prefix,
+    collect_lora_stack,
+    select_lora_names,
+    select_lora_model_strengths,
+    select_lora_clip_strengths,
+)
+
+def _collect_lora_stack(input_data):
+    stack = collect_lora_stack(input_data)
+    if stack:
+        return stack
+    names = select_stack_by_prefix(input_data, 'lora_name', counter_key='lora_count')
+    if not names:
+        return []
+    model_strengths = select_stack_by_prefix(input_data, 'model_str', counter_key='lora_count')
+    if not model_strengths:
+        model_strengths = select_stack_by_prefix(input_data, 'lora_wt', counter_key='lora_count')
+    clip_strengths = select_stack_by_prefix(input_data, 'clip_str', counter_key='lora_count')
+    if not clip_strengths:
+        clip_strengths = select_stack_by_prefix(input_data, 'lora_wt', counter_key='lora_count')
+    stack = []
+    for idx, name in enumerate(names):
+        model = model_strengths[idx] if idx < len(model_strengths) else None
+        clip = clip_strengths[idx] if idx < len(clip_strengths) else model
+        stack.append((name, model, clip))
+    return stack
+
+def get_lora_model_name_stack(node_id, obj, prompt, extra_data, outputs, input_data):
+    stack = _collect_lora_stack(input_data)
+    return [entry[0] for entry in stack]
+
+def get_lora_model_hash_stack(node_id, obj, prompt, extra_data, outputs, input_data):
+    stack = _collect_lora_stack(input_data)
+    return [calc_lora_hash(entry[0], input_data) for entry in stack]
+
+def get_lora_strength_model_stack(node_id, obj, prompt, extra_data, outputs, input_data):
+    stack = _collect_lora_stack(input_data)
+    return [entry[1] for entry in stack]
+
+def get_lora_strength_clip_stack(node_id, obj, prompt, extra_data, outputs, input_data):
+    stack = _collect_lora_stack(input_data)
+    return [entry[2] for entry in stack]
+
+KNOWN = {
+    'calc_model_hash': calc_model_hash,
+    'calc_vae_hash': calc_vae_hash,
+    'calc_lora_hash': calc_lora_hash,
+    'calc_unet_hash': calc_unet_hash,
+    'convert_skip_clip': convert_skip_clip,
+    'get_scaled_width': get_scaled_width,
+    'get_scaled_height': get_scaled_height,
+    'extract_embedding_names': extract_embedding_names,
+    'extract_embedding_hashes': extract_embedding_hashes,
+    'is_positive_prompt': is_positive_prompt,
+    'is_negative_prompt': is_negative_prompt,
+    'collect_lora_stack': collect_lora_stack,
+    'select_lora_names': select_lora_names,
+    'select_lora_model_strengths': select_lora_model_strengths,
+    'select_lora_clip_strengths': select_lora_clip_strengths,
+    'get_lora_model_name_stack': get_lora_model_name_stack,
+    'get_lora_model_hash_stack': get_lora_model_hash_stack,
+    'get_lora_strength_model_stack': get_lora_strength_model_stack,
+    'get_lora_strength_clip_stack': get_lora_strength_clip_stack,
+}
+
+RULES_VERSION = "1.4.2"
+
+SAMPLERS = {
+    "AppendSampler": {
+        "positive": "positive"
+    }
+}
+
+CAPTURE_FIELD_LIST = {
+    "AppendNode": {
+        MetaField.MODEL_NAME: {'field_name': "ckpt"},
+        MetaField.POSITIVE_PROMPT: {'field_name': "positive"},
+    },
+}
@@ -0,0 +1,4 @@
+# Placeholder generated_user_rules.py (test coverage stability)
+CAPTURE_FIELD_LIST = {}
+SAMPLERS = {}
+KNOWN = {}
@@ -220,8 +220,8 @@ class Trace:
                 #  (node_id, value, field_name, other...)
                 # Existing downstream only needs node_id/value and distance from trace tree.
                 try:
-                    # Accept list or tuple entries (UP038 compliant union syntax)
-                    if not isinstance(entry, list | tuple):  # noqa: UP038 - explicit modern union usage
+                    # Accept list or tuple entries; the tuple form skips building a UnionType per entry
+                    if not isinstance(entry, (list, tuple)):
                         continue
                     if len(entry) < 2:
                         continue
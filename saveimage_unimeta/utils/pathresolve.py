@@ -82,6 +82,11 @@ _LAST_PROBE_CANDIDATES: list[str] = []
 # Precompiled full-hex regex for fast 64-char validation
 _HEX64_RE = re.compile(r"^[0-9a-fA-F]{64}$")
 
+# (filepath, sidecar_ext) -> (file stat signature, sidecar stat signature, full hash).
+# Entries are revalidated against (mtime_ns, size) so edited files / sidecars are re-read.
+_FULL_HASH_MEMO_MAX = 256
+_FULL_HASH_MEMO: dict[tuple[str, str], tuple[tuple[int, int], tuple[int, int] | None, str]] = {}
+
 
 def sanitize_candidate(name: str, trim_trailing_punct: bool = True) -> str:
     """Normalize a candidate filename.
@@ -179,7 +184,7 @@ def has_supported_extension(name: str) -> bool:
         bool: True if the filename has a supported extension, False otherwise.
     """
     ln = name.lower()
-    return any(ln.endswith(ext) for ext in SUPPORTED_MODEL_EXTENSIONS)
+    return ln.endswith(SUPPORTED_MODEL_EXTENSIONS)
 
 
 def _probe_folder(kind: str, base_name: str) -> str | None:
@@ -342,6 +347,15 @@ def try_resolve_artifact(
     return ResolutionResult(display_name=display_name, full_path=path)
 
 
+def _stat_signature(path: str) -> tuple[int, int] | None:
+    """Return ``(mtime_ns, size)`` for ``path`` or None when it cannot be stat'ed."""
+    try:
+        st = os.stat(path)
+    except (OSError, ValueError):
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
 def load_or_calc_hash(
     filepath: str,
     *,
@@ -356,7 +370,9 @@ def load_or_calc_hash(
     This function provides an efficient way to get the hash of a file by
     caching the result in a sidecar file. If the sidecar file exists, the hash
     is read from it; otherwise, the hash is computed, saved to the sidecar,
-    and then returned.
+    and then returned. Results are also memoized in-process per path and
+    reused while the file and its sidecar keep the same mtime and size, so
+    repeated saves skip re-reading the sidecar.
 
     Args:
         filepath (str): The absolute path to the file to be hashed.
@@ -375,16 +391,26 @@ def load_or_calc_hash(
     Returns:
         str | None: The (possibly truncated) hash, or None on failure.
     """
-    if not filepath or not os.path.exists(filepath):
+    if not filepath:
+        return None
+    file_sig = _stat_signature(filepath)
+    if file_sig is None:
         return None
     base, _ = os.path.splitext(filepath)
     sidecar = base + sidecar_ext
+    sidecar_sig = _stat_signature(sidecar)
     full_hash: str | None = None
     if force_rehash is None:
         # Allow runtime override (env) to force recomputation (debug / mismatch diagnosis).
         force_rehash = os.environ.get("METADATA_FORCE_REHASH") == "1"
 
-    if not force_rehash and os.path.exists(sidecar):
+    memo_key = (filepath, sidecar_ext)
+    if not force_rehash:
+        cached = _FULL_HASH_MEMO.get(memo_key)
+        if cached is not None and cached[0] == file_sig and cached[1] == sidecar_sig:
+            return cached[2] if truncate is None else cached[2][:truncate]
+
+    if not force_rehash and sidecar_sig is not None:
         try:
             with open(sidecar, encoding="utf-8") as f:
                 candidate = f.read().strip()
@@ -418,6 +444,12 @@ def load_or_calc_hash(
                     except Exception:
                         # Ignore errors from sidecar_error_cb to avoid interfering with main flow.
                         pass
+            # The sidecar was just (re)written; record its new signature.
+            sidecar_sig = _stat_signature(sidecar)
+    if full_hash:
+        if len(_FULL_HASH_MEMO) >= _FULL_HASH_MEMO_MAX:
+            _FULL_HASH_MEMO.clear()
+        _FULL_HASH_MEMO[memo_key] = (file_sig, sidecar_sig, full_hash)
     return full_hash if truncate is None else full_hash[:truncate]
 
 
@@ -1,10 +1,10 @@
 """Provides version resolution for the `saveimage_unimeta` package.
 
 This module is responsible for determining the version of the package at
-runtime. It attempts to read the version from the package metadata and falls
-back to parsing the `pyproject.toml` file. It also allows for overriding the
-version through an environment variable, which is useful for testing and
-development.
+runtime. It reads the version from the package metadata and only falls back
+to parsing the `pyproject.toml` file when no distribution is installed. It
+also allows for overriding the version through an environment variable,
+which is useful for testing and development.
 """
 from __future__ import annotations
 
@@ -57,11 +57,10 @@ try:
     _dist_version: str | None = importlib.metadata.version("SaveImageWithMetaDataUniversal")
 except importlib.metadata.PackageNotFoundError:
     _dist_version = None
-_pyproj_version = _read_pyproject_version()
-if _pyproj_version and (_dist_version is None or _pyproj_version != _dist_version):
-    _RESOLVED_VERSION: str = _pyproj_version
-else:
-    _RESOLVED_VERSION = _dist_version or _pyproj_version or "unknown"
+# Installed distributions already carry their version; only source checkouts (the usual
+# custom_nodes clone) pay for the parent walk and TOML parse.
+_pyproj_version = _read_pyproject_version() if _dist_version is None else None
+_RESOLVED_VERSION: str = _dist_version or _pyproj_version or "unknown"
 
 
 def resolve_runtime_version() -> str:
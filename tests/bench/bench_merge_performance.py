@@ -5,17 +5,17 @@ runtime distribution. Still runnable directly:
 
     python -m tests.bench.bench_merge_performance
 
-Outputs JSON summary to tests/_test_outputs/merge_bench.json (consistent with other
+Outputs a compact JSON summary to tests/_test_outputs/merge_bench.json (consistent with other
 test artifacts) and prints a human-readable verdict.
 """
 
 from __future__ import annotations
 
 import json
+import math
 import random
-import statistics
 import time
-from collections.abc import Callable, Mapping
+from collections.abc import Callable
 from pathlib import Path
 from typing import Any
 
@@ -24,53 +24,62 @@ MERGE_ITERS = 200  # merge operations per run
 REPEAT = 5  # repetitions for timing stability
 
 random.seed(42)
-BASE = {f"Node{i}": {"a": i, "b": i * 2} for i in range(SAMPLES)}
-USER_OK = {f"Node{i}": {"c": i + 1} for i in range(0, SAMPLES, 2)}
-USER_BAD = {f"Bad{i}": [1, 2, 3] for i in range(0, SAMPLES, 10)}
-USER_MIX = USER_OK | USER_BAD  # Python 3.9+ dict union
+_NODE_KEYS = [f"Node{i}" for i in range(SAMPLES)]
+BASE = {k: {"a": i, "b": i * 2} for i, k in enumerate(_NODE_KEYS)}
+# Every other node gets a valid override; every tenth index adds a non-dict entry to skip.
+USER_MIX: dict[str, Any] = {_NODE_KEYS[i]: {"c": i + 1} for i in range(0, SAMPLES, 2)}
+USER_MIX.update((f"Bad{i}", [1, 2, 3]) for i in range(0, SAMPLES, 10))
+
+
+def _copy_base(base: dict[str, Any]) -> dict[str, Any]:
+    # Every synthetic BASE value is a dict, so copy one level without a per-entry type check.
+    return {k: v.copy() for k, v in base.items()}
 
 
 def legacy_merge(base: dict[str, Any], user: dict[str, Any]) -> dict[str, Any]:
-    target = {k: (v.copy() if isinstance(v, dict) else v) for k, v in base.items()}
-    for key, val in user.items():
-        if isinstance(val, Mapping):
-            existing = target.get(key)
-            if key not in target or not isinstance(existing, Mapping):
-                target[key] = dict(val)
-            else:
-                existing.update(val)
+    target = _copy_base(base)
+    # Pre-filter once; exact type checks skip the Mapping ABC __instancecheck__ path.
+    user_dicts = {k: v for k, v in user.items() if type(v) is dict}
+    for key, val in user_dicts.items():
+        existing = target.get(key)
+        if type(existing) is dict:
+            existing.update(val)
         else:
-            pass  # simulate skip
+            target[key] = dict(val)
     return target
 
 
-def helper_merge(base: dict[str, Any], user: dict[str, Any]) -> dict[str, Any]:
-    target = {k: (v.copy() if isinstance(v, dict) else v) for k, v in base.items()}
+def _merge_user_sampler_entry(target: dict[str, Any], key: str, val) -> None:
+    # Module-level like the runtime helper in defs/__init__.py; no closure cell lookups.
+    if type(val) is not dict:
+        return
+    existing = target.get(key)
+    if type(existing) is dict:
+        existing.update(val)
+    else:
+        target[key] = dict(val)
 
-    def _merge_user_sampler_entry(key: str, val):
-        if not isinstance(val, Mapping):
-            return
-        existing = target.get(key)
-        if key not in target or not isinstance(existing, Mapping):
-            target[key] = dict(val)
-        else:
-            existing.update(val)
 
+def helper_merge(base: dict[str, Any], user: dict[str, Any]) -> dict[str, Any]:
+    target = _copy_base(base)
+    merge_entry = _merge_user_sampler_entry
     for key, val in user.items():
-        _merge_user_sampler_entry(key, val)
+        merge_entry(target, key, val)
     return target
 
 
 def time_fn(fn: Callable[[dict[str, Any], dict[str, Any]], dict[str, Any]], label: str) -> float:
-    timings = []
+    timings_ns = []
     for _ in range(REPEAT):
-        start = time.perf_counter()
+        start = time.perf_counter_ns()
         for _ in range(MERGE_ITERS):
             fn(BASE, USER_MIX)
-        end = time.perf_counter()
-        timings.append(end - start)
-    avg = statistics.mean(timings)
-    stdev = statistics.pstdev(timings)
+        timings_ns.append(time.perf_counter_ns() - start)
+    # Integer nanosecond timings; convert to seconds once after the population stats.
+    avg_ns = math.fsum(timings_ns) / REPEAT
+    stdev_ns = math.sqrt(math.fsum((t - avg_ns) ** 2 for t in timings_ns) / REPEAT)
+    avg = avg_ns / 1e9
+    stdev = stdev_ns / 1e9
     print(f"{label}: avg={avg:.6f}s stdev={stdev:.6f}s over {REPEAT} runs")
     return avg
 
@@ -99,8 +108,8 @@ def main():
     out_dir = repo_root / "tests" / "_test_outputs"
     out_dir.mkdir(parents=True, exist_ok=True)
     out_file = out_dir / "merge_bench.json"
-    with out_file.open("w", encoding="utf-8") as f:
-        json.dump(result, f, indent=2)
+    # Compact one-shot dumps stays on the C encoder; indent or json.dump fall back to pure Python.
+    out_file.write_text(json.dumps(result, separators=(",", ":")), encoding="utf-8")
     print(f"Wrote {out_file}")
 
 
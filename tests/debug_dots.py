@@ -4,7 +4,6 @@ Debug script to demonstrate the issue with dots in LoRA names.
 This helps understand where the problem occurs in filename resolution.
 """
 
-import os
 import sys
 import logging
 from pathlib import Path
@@ -69,9 +68,22 @@ def test_lora_with_dots():
             logger.error("  Hash calculation failed: %s", e)
 
     logger.info("=== Testing splitext behavior ===")
+    results = []
     for test_name in test_cases:
-        base, ext = os.path.splitext(test_name)
-        logger.info("'%s' -> base='%s', ext='%s'", test_name, base, ext)
+        base, ext = split_ext(test_name)
+        results.append(f"'{test_name}' -> base='{base}', ext='{ext}'")
+    logger.info("\n".join(results))
+
+
+def split_ext(name):
+    """Split a bare filename like os.path.splitext using one rpartition.
+
+    Leading dots do not start an extension (".single" has none), matching splitext.
+    """
+    head, sep, tail = name.rpartition(".")
+    if sep and head.strip("."):
+        return head, sep + tail
+    return name, ""
 
 
 if __name__ == '__main__':
@@ -141,3 +141,74 @@ def test_model_hash_formatter_requires_path_like_values(monkeypatch: pytest.Monk
     hash_entries = inputs[MetaField.MODEL_HASH]
     values = [entry[1] for entry in hash_entries]
     assert values == ["TokenOnly", "HASHED"]
+
+
+def test_normalized_rules_cached_until_rules_change(monkeypatch: pytest.MonkeyPatch):
+    capture_mod = importlib.import_module(MODULE_PATH)
+    monkeypatch.setattr(capture_mod, "_RULE_CACHE", {})
+
+    rules = {"MODEL_NAME": {"field_name": "a"}, "NOT_A_FIELD": {}, int(MetaField.SEED): {"field_name": "s"}}
+    first = capture_mod._normalized_rules(rules)
+    assert [rule.meta for rule in first] == [MetaField.MODEL_NAME, MetaField.SEED]
+    assert capture_mod._normalized_rules(rules) is first
+
+    rules[MetaField.STEPS] = {"field_name": "steps"}
+    grown = capture_mod._normalized_rules(rules)
+    assert grown[-1].meta == MetaField.STEPS
+
+    monkeypatch.setattr(capture_mod._defs, "RULES_REVISION", capture_mod._defs.RULES_REVISION + 1)
+    assert capture_mod._normalized_rules(rules) is not grown
+
+
+def test_formatters_classified_once_per_rule():
+    capture_mod = importlib.import_module(MODULE_PATH)
+
+    def calc_lora_hash(value, _input_data):
+        return value
+
+    def to_upper(value, _input_data):
+        return value.upper()
+
+    rules = {
+        MetaField.LORA_MODEL_HASH: {"field_name": "a", "format": calc_lora_hash},
+        MetaField.LORA_MODEL_NAME: {"field_name": "a", "format": calc_lora_hash},
+        MetaField.POSITIVE_PROMPT: {"field_name": "b", "format": to_upper},
+        MetaField.SEED: {"field_name": "c"},
+    }
+    kinds = {rule.meta: (rule.fmt_kind, rule.funcname) for rule in capture_mod._normalized_rules(rules)}
+    assert kinds == {
+        MetaField.LORA_MODEL_HASH: (capture_mod._FMT_HASH, "calc_lora_hash"),
+        MetaField.LORA_MODEL_NAME: (capture_mod._FMT_NONE, "calc_lora_hash"),
+        MetaField.POSITIVE_PROMPT: (capture_mod._FMT_PLAIN, "to_upper"),
+        MetaField.SEED: (capture_mod._FMT_NONE, ""),
+    }
+    assert capture_mod._hash_folder_kind(capture_mod.calc_vae_hash, "") == "vae"
+    assert capture_mod._hash_folder_kind(to_upper, "to_upper") is None
+
+
+def test_get_input_data_skipped_when_no_rule_matches(monkeypatch: pytest.MonkeyPatch):
+    capture_mod = importlib.import_module(MODULE_PATH)
+
+    prompt = {
+        "30": {"class_type": "SeedOnly", "inputs": {"unrelated": 1}},
+        "31": {"class_type": "SeedOnly", "inputs": {"seed": 42}},
+    }
+    install_prompt_environment(monkeypatch, capture_mod, prompt)
+    resolved = []
+
+    def counting_get_input_data(node_inputs, _obj_class, node_id, *_args):
+        resolved.append(node_id)
+        return (node_inputs,)
+
+    monkeypatch.setattr(capture_mod, "get_input_data", counting_get_input_data)
+    monkeypatch.setattr(
+        capture_mod,
+        "CAPTURE_FIELD_LIST",
+        {"SeedOnly": {MetaField.SEED: {"field_name": "seed"}, MetaField.STEPS: {"prefix": "step"}}},
+    )
+
+    inputs = capture_mod.Capture.get_inputs()
+
+    assert resolved == ["31"]
+    assert [entry[1] for entry in inputs[MetaField.SEED]] == [42]
+    assert inputs[MetaField.STEPS] == []
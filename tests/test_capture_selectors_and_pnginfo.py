@@ -214,6 +214,48 @@ def test_sampler_fallback_from_this_node_inputs(monkeypatch: pytest.MonkeyPatch)
     assert pnginfo.get("Sampler") == "euler_ancestral"
 
 
+def test_sampler_heuristic_finds_embedded_token_outside_prompts():
+    """The last-resort sampler scan accepts a standalone token inside non-prompt strings only."""
+    capture_mod = importlib.import_module(MODULE_PATH)
+    Capture = capture_mod.Capture
+
+    prompt_only = {
+        MetaField.POSITIVE_PROMPT: [("1", "portrait, heun style lighting", "text")],
+        MetaField.LORA_MODEL_NAME: [("2", "lcm-lora-sdxl.safetensors", "lora_name")],
+    }
+    assert "Sampler" not in Capture.gen_pnginfo_dict(prompt_only, {}, False)
+
+    embedded = {**prompt_only, "note": [("3", "Sampler: DPMPP_2M_SDE_GPU", "note")]}
+    assert Capture.gen_pnginfo_dict(embedded, {}, False).get("Sampler") == "dpmpp_2m_sde_gpu"
+
+
+def test_sampler_heuristic_ignores_model_names_and_paths():
+    """Model/file names and path-like values never yield an embedded sampler token."""
+    capture_mod = importlib.import_module(MODULE_PATH)
+    Capture = capture_mod.Capture
+
+    for name in ("sdxl/lcm/dreamshaper.safetensors", "My Euler Style.safetensors"):
+        inputs = {MetaField.MODEL_NAME: [("1", name, "ckpt_name")]}
+        assert "Sampler" not in Capture.gen_pnginfo_dict(inputs, {}, False)
+
+    path_note = {"note": [("2", "C:\\presets\\euler ancestral\\notes.txt", "note")]}
+    assert "Sampler" not in Capture.gen_pnginfo_dict(path_note, {}, False)
+
+
+def test_sampler_heuristic_prefers_exact_token_over_embedded():
+    """An exact token in either snapshot wins over a token embedded in earlier free text."""
+    capture_mod = importlib.import_module(MODULE_PATH)
+    Capture = capture_mod.Capture
+
+    model = {MetaField.MODEL_NAME: [("1", "sdxl/lcm/dreamshaper.safetensors", "ckpt_name")]}
+    scheduler = {MetaField.SCHEDULER: [("2", "euler", "scheduler")]}
+    assert Capture.gen_pnginfo_dict(model, scheduler, False).get("Sampler") == "euler_euler"
+
+    before_sampler = {"note": [("3", "sampler: lcm", "note")]}
+    before_this = {"note": [("4", "heun", "note")]}
+    assert Capture.gen_pnginfo_dict(before_sampler, before_this, False).get("Sampler") == "heun"
+
+
 def test_civitai_sampler_uses_scheduler_fallback_from_this_node():
     """Unsupported Civitai samplers should still keep a fallback scheduler suffix."""
     capture_mod = importlib.import_module(MODULE_PATH)
@@ -428,3 +470,15 @@ def test_gen_parameters_str_include_lora_summary_override(monkeypatch: pytest.Mo
     # With override=True, summary should appear
     result = Capture.gen_parameters_str(pnginfo, include_lora_summary=True)
     assert "LoRAs:" in result or "Lora_0" in result
+
+
+def test_civitai_hashes_are_compact_ascii_json(monkeypatch: pytest.MonkeyPatch):
+    """Hashes uses compact separators while non-ASCII resource names stay \\u-escaped."""
+    capture_mod = importlib.import_module(MODULE_PATH)
+    Capture = capture_mod.Capture
+
+    hashes = {"model": "abc1234567", "lora:café": "def4567890"}
+    monkeypatch.setattr(Capture, "get_hashes_for_civitai", classmethod(lambda cls, *args, **kwargs: dict(hashes)))
+
+    pnginfo = Capture.gen_pnginfo_dict({}, {}, True)
+    assert pnginfo["Hashes"] == '{"model":"abc1234567","lora:caf\\u00e9":"def4567890"}'
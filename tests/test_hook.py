@@ -55,3 +55,33 @@ def test_pre_get_input_data_updates_only_for_save_node(fresh_hook_module):
 
     fresh_hook_module.pre_get_input_data({}, AnotherNode, "ignored")
     assert fresh_hook_module.current_save_image_node_id == "node-123"
+
+
+# prefix_function runs the pre-hook first and never lets a hook failure abort the call.
+def test_prefix_function_runs_prehook_and_swallows_errors(caplog):
+    from ComfyUI_SaveImageWithMetaDataUniversal import saveimage_unimeta as pkg
+
+    calls = []
+
+    def original(a, b=0):
+        """Original docstring."""
+        calls.append(("orig", a, b))
+        return a + b
+
+    def pre(a, b=0):
+        calls.append(("pre", a, b))
+
+    def broken_pre(*_args, **_kwargs):
+        raise RuntimeError("boom")
+
+    wrapped = pkg.prefix_function(original, pre)
+    assert wrapped(1, b=2) == 3
+    assert calls == [("pre", 1, 2), ("orig", 1, 2)]
+    assert wrapped.__name__ == "original"
+
+    failing = pkg.prefix_function(original, broken_pre)
+    with caplog.at_level("WARNING"):
+        assert failing(4) == 4
+        assert failing(5) == 5
+    warnings = [r for r in caplog.records if "broken_pre" in r.getMessage()]
+    assert len(warnings) == 1
@@ -4,6 +4,7 @@ import os
 
 import folder_paths
 
+from saveimage_unimeta.utils import pathresolve
 from saveimage_unimeta.utils.pathresolve import (
     EXTENSION_ORDER,
     SUPPORTED_MODEL_EXTENSIONS,
@@ -387,3 +388,76 @@ class TestLoadOrCalcHash:
 
         sidecar = tmp_path / "model.myhash"
         assert sidecar.exists()
+
+    def test_repeat_calls_reuse_memoized_hash(self, tmp_path, monkeypatch):
+        """Should not recompute or re-read the sidecar while file and sidecar are unchanged."""
+        monkeypatch.setattr(pathresolve, "_FULL_HASH_MEMO", {})
+        test_file = tmp_path / "model.safetensors"
+        test_file.write_bytes(b"test content")
+
+        computed_paths = []
+        first = load_or_calc_hash(str(test_file), on_compute=computed_paths.append)
+
+        real_open = open
+        opened = []
+
+        def tracking_open(path, *args, **kwargs):
+            opened.append(path)
+            return real_open(path, *args, **kwargs)
+
+        monkeypatch.setattr("builtins.open", tracking_open)
+        second = load_or_calc_hash(str(test_file), on_compute=computed_paths.append)
+        full = load_or_calc_hash(str(test_file), truncate=None)
+
+        assert second == first
+        assert full is not None and full[:10] == first
+        assert computed_paths == [str(test_file)]
+        assert opened == []
+
+    def test_memo_invalidated_when_file_changes(self, tmp_path, monkeypatch):
+        """Should go back to the sidecar once the file's size or mtime changes."""
+        monkeypatch.setattr(pathresolve, "_FULL_HASH_MEMO", {})
+        test_file = tmp_path / "model.safetensors"
+        test_file.write_bytes(b"test content")
+        load_or_calc_hash(str(test_file))
+
+        real_open = open
+        opened = []
+
+        def tracking_open(path, *args, **kwargs):
+            opened.append(os.fspath(path))
+            return real_open(path, *args, **kwargs)
+
+        monkeypatch.setattr("builtins.open", tracking_open)
+        test_file.write_bytes(b"different, longer content")
+        load_or_calc_hash(str(test_file))
+
+        assert opened == [str(tmp_path / "model.sha256")]
+
+    def test_memo_invalidated_when_sidecar_changes(self, tmp_path, monkeypatch):
+        """Should pick up a rewritten sidecar instead of the memoized hash."""
+        monkeypatch.setattr(pathresolve, "_FULL_HASH_MEMO", {})
+        test_file = tmp_path / "model.safetensors"
+        test_file.write_bytes(b"test content")
+        load_or_calc_hash(str(test_file), truncate=None)
+
+        (tmp_path / "model.sha256").write_text("b" * 64 + "\n")
+
+        assert load_or_calc_hash(str(test_file), truncate=None) == "b" * 64
+
+    def test_failed_hash_is_not_memoized(self, tmp_path, monkeypatch):
+        """Should retry hashing after a failure instead of caching it."""
+        monkeypatch.setattr(pathresolve, "_FULL_HASH_MEMO", {})
+        test_file = tmp_path / "model.safetensors"
+        test_file.write_bytes(b"test content")
+        real_calc = pathresolve.calc_hash
+
+        def failing_calc(_path):
+            raise OSError("file busy")
+
+        monkeypatch.setattr(pathresolve, "calc_hash", failing_calc)
+        assert load_or_calc_hash(str(test_file)) is None
+        assert pathresolve._FULL_HASH_MEMO == {}
+
+        monkeypatch.setattr(pathresolve, "calc_hash", real_calc)
+        assert load_or_calc_hash(str(test_file)) is not None
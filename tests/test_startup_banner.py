@@ -58,7 +58,9 @@ def test_startup_message_emitted_once(monkeypatch: pytest.MonkeyPatch, caplog):
     try:
         with caplog.at_level("INFO"):
             for alias in MODULE_ALIASES:
-                _load_module(alias)
+                module = _load_module(alias)
+                # The banner is emitted when ComfyUI first reads the node registry.
+                len(module.NODE_CLASS_MAPPINGS)
     finally:
         for alias, module in saved_modules.items():
             if module is not None:
@@ -78,3 +80,24 @@ def test_startup_message_emitted_once(monkeypatch: pytest.MonkeyPatch, caplog):
         if "nodes successfully" in record.getMessage()
     ]
     assert len(banner_logs) == 1
+
+
+def test_node_mappings_deferred_until_first_read(monkeypatch: pytest.MonkeyPatch):
+    alias = "ComfyUI_SaveImageWithMetaDataUniversal"
+    saved = sys.modules.pop(alias, None)
+    monkeypatch.delenv("PYTEST_CURRENT_TEST", raising=False)
+    monkeypatch.delenv("METADATA_TEST_MODE", raising=False)
+    try:
+        module = _load_module(alias)
+        assert module._NODES_LOADED is False
+        assert "SaveImageWithMetaDataUniversal" in module.NODE_CLASS_MAPPINGS
+        assert module._NODES_LOADED is True
+        assert "SaveImageWithMetaDataUniversal" in module.NODE_DISPLAY_NAME_MAPPINGS
+    finally:
+        if saved is not None:
+            sys.modules[alias] = saved
+        else:
+            sys.modules.pop(alias, None)
+        registry_logger = logging.getLogger("_startup_registry")
+        if hasattr(registry_logger, SENTINEL):
+            delattr(registry_logger, SENTINEL)
@@ -1,44 +1,99 @@
-from PIL import Image, UnidentifiedImageError
-from PIL.ExifTags import TAGS, GPSTAGS
 import sys
 import os
 import argparse
+import zlib
+
+# Standard EXIF tag id for UserComment; compared directly instead of resolving TAGS names per tag.
+_USER_COMMENT_TAG = 0x9286
+_GPS_INFO_TAG = 0x8825
+_PNG_TEXT_CHUNKS = frozenset((b'tEXt', b'zTXt', b'iTXt'))
 
 def decode_user_comment(user_comment):
-    try:
-        # Decode the byte string as UTF-16 big-endian with backslash replacement
-        decoded_comment = user_comment.decode('utf-16be', 'backslashreplace')
-        return decoded_comment
-    except UnicodeDecodeError:
-        # If decoding fails, return the original byte string
+    """Decode an EXIF UserComment according to its 8-byte character code prefix."""
+    if not isinstance(user_comment, bytes):
         return user_comment
+    head, body = user_comment[:8], user_comment[8:]
+    if head.startswith(b'UNICODE'):
+        return body.decode('utf-16be', 'backslashreplace')
+    if head.startswith(b'ASCII'):
+        return body.decode('ascii', 'replace')
+    if head.startswith(b'JIS'):
+        return body.decode('shift_jis', 'replace')
+    # Undefined character code (eight NUL bytes): writers in practice emit UTF-8
+    return body.decode('utf-8', 'backslashreplace')
+
+def _decode_png_text(chunk_type: bytes, data: bytes) -> tuple[bytes, str]:
+    """Split a tEXt/zTXt/iTXt chunk payload into (keyword, text)."""
+    keyword, _, rest = data.partition(b'\x00')
+    if chunk_type == b'tEXt':
+        return keyword, rest.decode('latin-1')
+    if chunk_type == b'zTXt':
+        # rest = compression method (1 byte) + zlib stream
+        return keyword, zlib.decompress(rest[1:]).decode('latin-1')
+    # iTXt: compression flag, compression method, language tag\0, translated keyword\0, UTF-8 text
+    compressed = rest[:1] == b'\x01'
+    _, _, rest = rest[2:].partition(b'\x00')
+    _, _, text = rest.partition(b'\x00')
+    if compressed:
+        text = zlib.decompress(text)
+    return keyword, text.decode('utf-8', 'replace')
+
+
+def read_png_parameters(image_path: str) -> str | None:
+    """Return the PNG 'parameters' text chunk, reading chunk headers instead of the whole file.
+
+    Chunks are [length(4)][type(4)][data][CRC(4)]; non-text chunks (IDAT) are skipped with seek,
+    so memory stays bounded by the largest text chunk.
+    """
+    with open(image_path, 'rb') as f:
+        if f.read(8) != b'\x89PNG\r\n\x1a\n':
+            return None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                return None
+            length = int.from_bytes(header[:4], 'big')
+            chunk_type = header[4:]
+            if chunk_type in _PNG_TEXT_CHUNKS:
+                keyword, text = _decode_png_text(chunk_type, f.read(length))
+                if keyword == b'parameters':
+                    return text
+                f.seek(4, os.SEEK_CUR)  # CRC
+            elif chunk_type == b'IEND':
+                return None
+            else:
+                f.seek(length + 4, os.SEEK_CUR)
+
 
 def get_exif_data(image_path: str) -> str:
     """Return metadata string for the image (EXIF UserComment or PNG parameters)."""
+    # Pillow is imported on first use so `--help` and argument errors return immediately.
+    from PIL import Image, UnidentifiedImageError
+    from PIL.ExifTags import GPSTAGS
+
     lines: list[str] = []
     try:
         with Image.open(image_path) as image:
+            is_png = image.format == 'PNG'
+            # Parse the EXIF segment once. PNGs only carry EXIF in an optional eXIf chunk, which
+            # Pillow surfaces as info['exif']; skip the parse entirely when it is absent.
+            exif_data = None
+            if hasattr(image, '_getexif') and (not is_png or 'exif' in image.info):
+                exif_data = image._getexif()
             # EXIF path (JPEG/WebP/etc.)
-            if hasattr(image, '_getexif') and image._getexif() is not None:
+            if exif_data is not None:
                 try:
-                    exif_data = image._getexif()
-                    for tag, value in exif_data.items():
-                        tag_name = TAGS.get(tag, tag)
-                        if tag_name == 'UserComment':
-                            value = decode_user_comment(value)
-                            # EXIF UserComment may start with an encoding marker/BOM; trim the first
-                            # four bytes to drop that prefix and match the original script's behavior.
-                            if len(value) >= 4:
-                                value = value[4:]
-                            lines.append(str(value))
-                    if 'GPSInfo' in exif_data:
-                        for tag, value in exif_data['GPSInfo'].items():
+                    value = exif_data.get(_USER_COMMENT_TAG)
+                    if value is not None:
+                        lines.append(str(decode_user_comment(value)))
+                    if _GPS_INFO_TAG in exif_data:
+                        for tag, value in exif_data[_GPS_INFO_TAG].items():
                             tag_name = GPSTAGS.get(tag, tag)
                             lines.append(f"GPS {tag_name}: {value}")
                 except (KeyError, TypeError, ValueError) as e:
                     lines.append(f"Error reading EXIF: {e}")
             # PNG path
-            elif image_path.lower().endswith('.png'):
+            elif is_png:
                 png_info = image.info
                 # If structured tEXt chunks accessible via Pillow
                 if png_info and 'tEXt' in png_info:
@@ -48,22 +103,14 @@ def get_exif_data(image_path: str) -> str:
                     except (KeyError, ValueError) as e:
                         lines.append(f"Error reading tEXt chunks: {e}")
                 else:
-                    # Fallback: raw binary search between markers (keep original ordering; do NOT move Hashes)
+                    # Fallback: walk the PNG chunk list for the 'parameters' text chunk
                     try:
-                        with open(image_path, 'rb') as f:
-                            binary_content = f.read()
-                        start_index = binary_content.find(b'parameters')
-                        near_end_index = binary_content.find(b'Hashes: ')
-                        # PNG chunks follow [length(4)][type(4)][data][CRC(4)]. Subtracting 9 bytes here trims the
-                        # trailing tEXt chunk header (length + type + newline delimiter) so the metadata payload
-                        # mirrors the original script's parsing boundaries.
-                        end_index = binary_content.find(b'tEXt', near_end_index) - 9 if near_end_index != -1 else -1
-                        if start_index != -1 and end_index != -1:
-                            extracted_info = binary_content[start_index + len(b'parameters') + 1:end_index + 1].decode('utf-8', 'replace').strip()
-                            lines.append(extracted_info)
+                        extracted_info = read_png_parameters(image_path)
+                        if extracted_info is not None:
+                            lines.append(extracted_info.strip())
                         else:
                             lines.append("No valid parameter block found in PNG.")
-                    except (OSError, UnicodeDecodeError) as e:
+                    except (OSError, ValueError, zlib.error) as e:
                         lines.append(f"Error processing PNG binary: {e}")
             else:
                 lines.append("No EXIF data or PNG metadata found.")
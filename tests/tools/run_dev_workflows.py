@@ -14,26 +14,44 @@ Requirements:
     - To convert: Enable Dev Mode in ComfyUI UI, then "Save (API format)"
 """
 
-import argparse
+from __future__ import annotations
+
+import hashlib
+import http.client
 import json
-import math
 import os
-import subprocess
 import sys
+import threading
 import time
-import urllib.error
-import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-try:
-    from send2trash import send2trash
-except ImportError:
-    send2trash = None
+# subprocess, send2trash and argparse are imported where they are used so a run against an
+# already-running server without cleanup never loads them.
+if TYPE_CHECKING:
+    import subprocess
 
 
 TOOLS_DIR = Path(__file__).resolve().parent
 TESTS_ROOT = TOOLS_DIR.parent
 CLI_COMPAT_DIR = TESTS_ROOT / "comfyui_cli_tests"
+# Remembers which workflow files already parsed cleanly so reruns can skip re-validating them.
+VALIDATION_CACHE_PATH = TOOLS_DIR / ".cache" / "workflow_validation.json"
+
+
+def _split_extra_args(raw: str) -> list[str]:
+    """Split a ComfyUI extra-arguments string, honouring quoted values like ``--foo "a b"``.
+
+    Windows uses non-POSIX splitting so backslashes in paths survive; the quotes it keeps
+    around tokens are stripped because subprocess re-quotes arguments itself.
+    """
+    import shlex
+
+    if os.name != "nt":
+        return shlex.split(raw)
+    tokens = shlex.split(raw, posix=False)
+    return [tok[1:-1] if len(tok) >= 2 and tok[0] == tok[-1] == '"' else tok for tok in tokens]
 
 
 def _resolve_path(raw_path: str | None, *, fallback: Path | None = None) -> Path | None:
@@ -71,6 +89,8 @@ class WorkflowRunner:
         temp_dir: str | None = None,
         extra_args: list[str] | None = None,
         env_patch: dict[str, str] | None = None,
+        validation_cache_path: Path | None = VALIDATION_CACHE_PATH,
+        server_log: str | None = None,
     ):
         self.comfyui_path = Path(comfyui_path).resolve()
         self.python_exe = python_exe or sys.executable
@@ -82,18 +102,95 @@ class WorkflowRunner:
         self.server_process: subprocess.Popen[bytes] | None = None
         self.last_start_error: Exception | None = None
         self.base_url = f"http://{host}:{port}"
-
-    def is_server_running(self) -> bool:
+        self.validation_cache_path = validation_cache_path
+        self._validation_cache: dict[str, list] | None = None
+        self._validation_cache_dirty = False
+        self._send2trash = None
+        self.server_log = server_log
+        self._server_log_file = None
+
+        # Server command line, built once; extra arguments (e.g., --windows-standalone-build) go last
+        self._server_cmd = [
+            self.python_exe,
+            str(self.comfyui_path / "main.py"),
+            "--listen",
+            self.host,
+            "--port",
+            str(self.port),
+        ]
+        if self.temp_dir:
+            self._server_cmd.extend(["--temp-directory", self.temp_dir])
+        self._server_cmd.extend(self.extra_args)
+        # One keep-alive connection per thread, reused for status polls and prompt submissions.
+        self._local = threading.local()
+        self._conns: list[http.client.HTTPConnection] = []
+        self._conns_lock = threading.Lock()
+
+    def _request(
+        self,
+        method: str,
+        path: str,
+        body: bytes | None = None,
+        headers: dict[str, str] | None = None,
+        timeout: float = 30,
+    ) -> tuple[int, str, bytes]:
+        """Send a request over the pooled connection and return (status, reason, body).
+
+        A connection the server has already closed is reopened once and the request resent;
+        any other failure drops the connection and propagates.
+        """
+        conn = getattr(self._local, "conn", None)
+        reused = conn is not None
+        if conn is None:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+            self._local.conn = conn
+            with self._conns_lock:
+                self._conns.append(conn)
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        try:
+            conn.request(method, path, body=body, headers=headers or {})
+            response = conn.getresponse()
+            return response.status, response.reason, response.read()
+        except (ConnectionResetError, BrokenPipeError, http.client.BadStatusLine):
+            self._drop_connection()
+            if not reused:
+                raise
+            return self._request(method, path, body=body, headers=headers, timeout=timeout)
+        except (OSError, http.client.HTTPException):
+            self._drop_connection()
+            raise
+
+    def _drop_connection(self) -> None:
+        """Close and forget the calling thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            self._local.conn = None
+            with self._conns_lock:
+                self._conns.remove(conn)
+            conn.close()
+
+    def close(self) -> None:
+        """Close every pooled HTTP connection opened by this runner."""
+        with self._conns_lock:
+            conns, self._conns = self._conns, []
+        for conn in conns:
+            conn.close()
+        self._local = threading.local()
+
+    def is_server_running(self, timeout: float = 2) -> bool:
         """Check if ComfyUI server is accessible."""
         try:
-            req = urllib.request.Request(f"{self.base_url}/system_stats")
-            urllib.request.urlopen(req, timeout=2)
-            return True
-        except (urllib.error.URLError, urllib.error.HTTPError, TimeoutError):
+            status, _, _ = self._request("GET", "/system_stats", timeout=timeout)
+        except (OSError, http.client.HTTPException):
             return False
+        return status < 400
 
     def start_server(self, wait_time: float = 10) -> bool:
         """Start ComfyUI server in background."""
+        import subprocess
+
         self.last_start_error = None
         if self.is_server_running():
             print(f"✓ ComfyUI server already running at {self.base_url}")
@@ -107,14 +204,7 @@ class WorkflowRunner:
 
         print(f"Starting ComfyUI server at {self.base_url}...")
 
-        # Build command
-        cmd = [self.python_exe, str(main_py), "--listen", self.host, "--port", str(self.port)]
-
-        if self.temp_dir:
-            cmd.extend(["--temp-directory", self.temp_dir])
-
-        # Add extra arguments (e.g., --windows-standalone-build)
-        cmd.extend(self.extra_args)
+        cmd = self._server_cmd
 
         try:
             # Start server in background
@@ -122,22 +212,34 @@ class WorkflowRunner:
             if self.env_patch:
                 env.update(self.env_patch)
 
+            # Server output is never read here, so a PIPE would fill up and block ComfyUI on write.
+            # Discard it unless a log file was requested.
+            output = subprocess.DEVNULL
+            if self.server_log:
+                self._server_log_file = open(self.server_log, "ab")  # closed in stop_server
+                output = self._server_log_file
             self.server_process = subprocess.Popen(
                 cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
+                stdout=output,
+                stderr=subprocess.STDOUT if self.server_log else subprocess.DEVNULL,
                 cwd=str(self.comfyui_path),
                 env=env,
             )
 
-            # Wait for server to start
-            print(f"Waiting {wait_time}s for server to start...")
-            checks = max(math.ceil(wait_time / 0.5), 1)
-            for _ in range(checks):
-                time.sleep(0.5)
-                if self.is_server_running():
+            # Wait for server to start: poll with exponential backoff (50ms, x1.5, capped at 500ms) and a
+            # short per-poll timeout so a fast boot is detected immediately and refused connects fail fast.
+            print(f"Waiting up to {wait_time}s for server to start...")
+            deadline = time.monotonic() + wait_time
+            delay = 0.05
+            while True:
+                if self.is_server_running(timeout=0.25):
                     print("✓ Server started successfully")
                     return True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                time.sleep(min(delay, remaining))
+                delay = min(delay * 1.5, 0.5)
 
             print(f"✗ Server did not start within {wait_time}s")
             self.last_start_error = TimeoutError(f"Server did not start within {wait_time}s")
@@ -151,6 +253,9 @@ class WorkflowRunner:
 
     def stop_server(self):
         """Stop the ComfyUI server if started by this script."""
+        import subprocess
+
+        self.close()
         if self.server_process:
             print("Stopping ComfyUI server...")
             self.server_process.terminate()
@@ -161,35 +266,83 @@ class WorkflowRunner:
                 print("⚠ Server did not stop gracefully, killing...")
                 self.server_process.kill()
                 self.server_process.wait()
+        if self._server_log_file is not None:
+            self._server_log_file.close()
+            self._server_log_file = None
 
-    def queue_workflow(self, workflow: dict) -> tuple[bool, str]:
-        """Queue a workflow to the ComfyUI server."""
-        try:
-            data = json.dumps({"prompt": workflow}).encode("utf-8")
-            req = urllib.request.Request(f"{self.base_url}/prompt", data=data)
-            req.add_header("Content-Type", "application/json")
-
-            with urllib.request.urlopen(req, timeout=30) as response:
-                result = json.loads(response.read().decode("utf-8"))
-                prompt_id = result.get("prompt_id", "unknown")
-                return True, prompt_id
+    def queue_workflow(self, workflow: dict | bytes) -> tuple[bool, str]:
+        """Queue a workflow to the ComfyUI server.
 
-        except urllib.error.URLError as e:
-            return False, f"URLError: {e}"
+        ``workflow`` may be a dict or the raw JSON bytes from ``load_workflow``; bytes are spliced
+        into the request envelope without a parse/serialize round-trip.
+        """
+        try:
+            if isinstance(workflow, bytes):
+                data = b'{"prompt":' + workflow + b"}"
+            else:
+                data = json.dumps({"prompt": workflow}).encode("utf-8")
+            status, reason, body = self._request(
+                "POST", "/prompt", body=data, headers={"Content-Type": "application/json"}
+            )
+            if status >= 400:
+                return False, f"HTTP Error {status}: {reason}"
+            result = json.loads(body.decode("utf-8"))
+            prompt_id = result.get("prompt_id", "unknown")
+            return True, prompt_id
+
+        except (OSError, http.client.HTTPException) as e:
+            return False, f"ConnectionError: {e}"
         except json.JSONDecodeError as e:
             return False, f"JSONDecodeError: {e}"
 
-    def load_workflow(self, workflow_path: Path) -> dict | None:
-        """Load and validate a workflow JSON file."""
+    def _load_validation_cache(self) -> dict[str, list]:
+        if self._validation_cache is None:
+            self._validation_cache = {}
+            if self.validation_cache_path is not None:
+                try:
+                    cached = json.loads(self.validation_cache_path.read_text(encoding="utf-8"))
+                    if isinstance(cached, dict):
+                        self._validation_cache = cached
+                except (OSError, ValueError):
+                    pass
+        return self._validation_cache
+
+    def save_validation_cache(self) -> None:
+        """Persist the workflow validation cache if any entries changed."""
+        if self.validation_cache_path is None or not self._validation_cache_dirty:
+            return
         try:
-            with open(workflow_path, encoding="utf-8") as f:
-                workflow = json.load(f)
+            self.validation_cache_path.parent.mkdir(parents=True, exist_ok=True)
+            self.validation_cache_path.write_text(json.dumps(self._validation_cache), encoding="utf-8")
+            self._validation_cache_dirty = False
+        except OSError as e:
+            print(f"⚠ Could not write workflow cache {self.validation_cache_path}: {e}")
+
+    def load_workflow(self, workflow_path: Path) -> bytes | None:
+        """Load and validate a workflow JSON file, returning its raw UTF-8 bytes.
+
+        Files whose (mtime, size, blake2b digest) match a previous clean parse skip JSON
+        validation entirely; only the bytes are read.
+        """
+        try:
+            stat = workflow_path.stat()
+            raw = workflow_path.read_bytes()
+            cache = self._load_validation_cache()
+            cache_key = str(workflow_path.resolve())
+            fingerprint = [stat.st_mtime_ns, stat.st_size, hashlib.blake2b(raw, digest_size=8).hexdigest()]
+            if cache.get(cache_key) == fingerprint:
+                return raw
+
+            workflow = json.loads(raw.decode("utf-8"))
 
             # Basic validation - check if it's API format
             if not isinstance(workflow, dict):
                 print(f"  ⚠ Warning: {workflow_path.name} is not a dict, might not be API format")
+            else:
+                cache[cache_key] = fingerprint
+                self._validation_cache_dirty = True
 
-            return workflow
+            return raw
 
         except json.JSONDecodeError as e:
             print(f"  ✗ Error: Invalid JSON in {workflow_path.name}: {e}")
@@ -198,13 +351,42 @@ class WorkflowRunner:
             print(f"  ✗ Error loading {workflow_path.name}: {e}")
             return None
 
-    def clean_output_folder(self, output_path: Path) -> bool:
-        """Clean the output folder by moving files to recycle bin."""
+    def clean_output_folder(self, output_path: Path, fast_delete: bool = False) -> bool:
+        """Clean the output folder by moving files to recycle bin.
+
+        With ``fast_delete`` the folder is removed with ``shutil.rmtree`` and recreated instead,
+        bypassing the recycle bin (no recovery, no send2trash dependency).
+        """
         if not output_path.exists():
             print(f"⚠ Output folder does not exist: {output_path}")
             print("  (It will be created when workflows run)")
             return True
 
+        if fast_delete:
+            import shutil
+
+            print(f"Deleting output folder contents (no recycle bin): {output_path}")
+            shutil.rmtree(output_path, ignore_errors=True)
+            try:
+                output_path.mkdir(parents=True, exist_ok=True)
+                with os.scandir(output_path) as entries:
+                    leftover = sum(1 for _ in entries)
+            except OSError as e:
+                print(f"  ✗ Failed to recreate {output_path}: {e}")
+                return False
+            if leftover:
+                print(f"  ✗ {leftover} items could not be deleted (locked or permission denied)")
+                return False
+            print("  ✓ Output folder emptied")
+            return True
+
+        if self._send2trash is None:
+            try:
+                from send2trash import send2trash
+            except ImportError:
+                send2trash = None
+            self._send2trash = send2trash
+        send2trash = self._send2trash
         if send2trash is None:
             print("⚠ Warning: send2trash not installed. Cannot clean output folder.")
             print("  Install with: pip install send2trash")
@@ -213,35 +395,61 @@ class WorkflowRunner:
         print(f"Cleaning output folder: {output_path}")
 
         # Get all files and folders in the directory
-        items = list(output_path.iterdir())
+        with os.scandir(output_path) as entries:
+            items = [entry.path for entry in entries]
 
         if not items:
             print("  ✓ Output folder is already empty")
             return True
 
+        # send2trash >= 1.8 accepts a list and trashes it in one shell operation; older releases
+        # (or a partial failure) fall through to the per-item loop for individual error reporting.
+        try:
+            send2trash(items)
+        except Exception:
+            pass
+        else:
+            print(f"  ✓ Moved {len(items)} items to recycle bin")
+            return True
+
         moved_count = 0
         error_count = 0
 
         for item in items:
+            name = os.path.basename(item)
+            if not os.path.lexists(item):
+                moved_count += 1
+                continue
             try:
-                send2trash(str(item))
+                send2trash(item)
                 moved_count += 1
-                print(f"  ✓ Moved to recycle bin: {item.name}")
+                print(f"  ✓ Moved to recycle bin: {name}")
             except Exception as e:
-                print(f"  ✗ Failed to move {item.name}: {e}")
+                print(f"  ✗ Failed to move {name}: {e}")
                 error_count += 1
 
         print(f"  Summary: {moved_count} items moved, {error_count} errors")
         return error_count == 0
 
-    def run_workflows(self, workflow_dir: Path, wait_between: float = 2.0) -> tuple[int, int]:
-        """Run all workflows in the specified directory."""
+    def run_workflows(
+        self, workflow_dir: Path, wait_between: float = 2.0, concurrency: int = 1
+    ) -> tuple[int, int]:
+        """Run all workflows in the specified directory.
+
+        With ``concurrency`` > 1 the workflows are submitted from a thread pool and ``wait_between``
+        is ignored; ComfyUI still executes its queue serially, but queue order is no longer
+        guaranteed to follow file name order.
+        """
         if not workflow_dir.exists():
             print(f"✗ Error: Directory not found: {workflow_dir}")
             return 0, 0
 
-        # Find all JSON files
-        workflow_files = sorted(workflow_dir.glob("*.json"))
+        # Find all JSON files; DirEntry carries the file type from the directory read, so no per-entry stat
+        with os.scandir(workflow_dir) as entries:
+            workflow_files = sorted(
+                (Path(entry.path) for entry in entries if entry.name.endswith(".json") and entry.is_file()),
+                key=lambda path: path.name,
+            )
 
         if not workflow_files:
             print(f"⚠ No workflow files found in {workflow_dir}")
@@ -249,6 +457,11 @@ class WorkflowRunner:
 
         print(f"\nFound {len(workflow_files)} workflow(s) to execute:\n")
 
+        if concurrency > 1:
+            result = self._run_workflows_concurrent(workflow_files, concurrency)
+            self.save_validation_cache()
+            return result
+
         success_count = 0
         fail_count = 0
 
@@ -275,10 +488,39 @@ class WorkflowRunner:
             if wait_between > 0 and workflow_file != workflow_files[-1]:
                 time.sleep(wait_between)
 
+        self.save_validation_cache()
+        return success_count, fail_count
+
+    def _run_workflows_concurrent(self, workflow_files: list[Path], concurrency: int) -> tuple[int, int]:
+        """Load workflows serially, then queue them from ``concurrency`` worker threads."""
+        success_count = 0
+        fail_count = 0
+        loaded: list[tuple[Path, bytes]] = []
+        for workflow_file in workflow_files:
+            workflow = self.load_workflow(workflow_file)
+            if workflow is None:
+                fail_count += 1
+            else:
+                loaded.append((workflow_file, workflow))
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            futures = {pool.submit(self.queue_workflow, workflow): path for path, workflow in loaded}
+            for future in as_completed(futures):
+                success, result = future.result()
+                name = futures[future].name
+                if success:
+                    print(f"✓ {name}: queued successfully (prompt_id: {result})")
+                    success_count += 1
+                else:
+                    print(f"✗ {name}: failed to queue: {result}")
+                    fail_count += 1
+
         return success_count, fail_count
 
 
 def main():
+    import argparse
+
     parser = argparse.ArgumentParser(
         description="Run ComfyUI workflows from tests/comfyui_cli_tests/dev_test_workflows folder",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -354,6 +596,12 @@ Examples:
         help='Extra arguments to pass to ComfyUI (e.g., "--windows-standalone-build --cpu")',
     )
 
+    parser.add_argument(
+        "--server-log",
+        type=str,
+        help="Append the started ComfyUI server's stdout/stderr to this file (default: discarded)",
+    )
+
     parser.add_argument(
         "--wait-between",
         type=float,
@@ -361,6 +609,16 @@ Examples:
         help="Seconds to wait between workflow executions (default: 2.0)",
     )
 
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help=(
+            "Number of workflows to submit in parallel (default: 1). Values above 1 ignore "
+            "--wait-between and do not preserve file-name queue order."
+        ),
+    )
+
     parser.add_argument(
         "--no-start-server",
         action="store_true",
@@ -385,6 +643,12 @@ Examples:
         help="Skip cleaning the output folder before running workflows",
     )
 
+    parser.add_argument(
+        "--fast-delete",
+        action="store_true",
+        help="Empty the output folder with a permanent delete instead of the recycle bin (no send2trash needed)",
+    )
+
     parser.add_argument(
         "--enable-test-stubs",
         action="store_true",
@@ -401,7 +665,7 @@ Examples:
     workflow_dir = _resolve_path(args.workflow_dir, fallback=CLI_COMPAT_DIR)
 
     # Parse extra args
-    extra_args = args.extra_args.split() if args.extra_args else []
+    extra_args = _split_extra_args(args.extra_args) if args.extra_args else []
 
     env_patch: dict[str, str] = {}
     if args.enable_test_stubs:
@@ -416,6 +680,7 @@ Examples:
         temp_dir=args.temp_dir,
         extra_args=extra_args,
         env_patch=env_patch,
+        server_log=args.server_log,
     )
 
     print("=" * 70)
@@ -432,7 +697,7 @@ Examples:
         if args.output_folder and not args.no_clean:
             output_path = Path(args.output_folder)
             print("\n" + "=" * 70)
-            if not runner.clean_output_folder(output_path):
+            if not runner.clean_output_folder(output_path, fast_delete=args.fast_delete):
                 print("⚠ Warning: Output folder cleanup had errors, continuing anyway...")
             print("=" * 70 + "\n")
 
@@ -448,7 +713,7 @@ Examples:
             print(f"✓ Using existing server at {runner.base_url}")
 
         # Run workflows
-        success, fail = runner.run_workflows(workflow_dir, args.wait_between)
+        success, fail = runner.run_workflows(workflow_dir, args.wait_between, args.concurrency)
 
         # Print summary
         print("\n" + "=" * 70)
@@ -468,6 +733,7 @@ Examples:
         # Stop server if we started it
         if not args.no_start_server and not args.keep_server:
             runner.stop_server()
+        runner.close()
 
 
 if __name__ == "__main__":